@@ -1,4 +1,6 @@
 import re
+import json
+import hashlib
 import time
 import urllib.request
 import os
@@ -9,6 +11,19 @@ from playwright.sync_api import sync_playwright, ElementHandle, Page
 from fake_useragent import UserAgent
 from logger import LoggerManager
 from database import DatabaseManager
+from dedup import ImageDeduplicator
+from scheduler import AuthorScheduler
+from context_pool import StandbyContextPool
+from preflight import LoginStatePreflight
+from result_stream import ResultStream
+from ocr import OshinagakiOCR
+from browser_profile import launch_browser, context_options, BrowserUsageMeter
+from media import (
+    MEDIA_VARIANTS, TRANSCODE_FORMATS, PREVIEW_VARIANT,
+    media_url, largest_variant, transcode_image, classify_preview
+)
+from concurrent.futures import ProcessPoolExecutor
+from PIL import features
 import requests
 
 
@@ -22,18 +37,46 @@ class TwitterCrawler:
     4. Close the browser.
     args:
         output_html: The name of the HTML file to save the results.
+        output_jsonl: The JSON Lines file results are streamed to while crawling (default: output_html with .jsonl).
         download_dir: The directory to save downloaded images.
         headless: Whether to run the browser in headless mode.
+        lean_profile: Whether to use the lean crawl profile (tuned Chromium flags, smaller viewport);
+            defaults to the value of headless.
         sessions_number: The session number used to generate keywords.
         custom_keywords: A list of custom keywords.
+        keyword_profiles: Optional {event name: keywords}; every author is searched once with the union,
+            and each event gets its own report. Overrides sessions_number / custom_keywords.
+        remove_duplicate_images: Whether to move near-duplicate images to downloaded_images/duplicates_trash after crawling,
+            keeping one per group (off by default; the report shows one image per group either way).
+        cache_ttl: Seconds a cached author search result is reused instead of crawling again (0 disables it).
+        prioritize_authors: Whether to crawl likely-productive authors first and revisit dormant ones less often.
+        revisit_policy: Optional AuthorScheduler arguments (dormant_after, base_revisit_days, max_revisit_days).
+        author_budget: Optional per-author limits {"seconds": ..., "scrolls": ..., "tweets": ...}.
+        run_deadline_seconds: Optional time limit of the whole run; remaining authors are deferred to the next run.
+        standby_contexts: Whether to keep a pre-loaded standby context per account for instant failover.
+        preflight_accounts: Whether to check every stored login state before crawling and drop the dead ones.
+        memory_limits: Optional memory watermarks {"page_heap_mb": ..., "browser_rss_mb": ...};
+            browser_rss_mb applies to the active context, standby contexts get STANDBY_CONTEXT_BUDGET_MB each on top.
+        ocr_images: Whether to OCR new images after crawling (needs tesseract) and show booth numbers in the report.
+        split_window_days: If set, search each author in date sub-ranges starting at this many days,
+            adapting the size to the number of tweets in the previous sub-range.
+        media_variant: Size variant of downloaded images (orig, 4096x4096, large, medium), or {event name: variant};
+            a tweet matching several events gets the largest of their variants. The original URL is always recorded.
+        transcode_format: Optional compact format (webp, avif) downloaded images are re-encoded to in worker processes.
+        preview_media: Whether to fetch a small preview of each image first and download the full image
+            only if it looks like an oshinagaki (off by default, the thresholds are not validated on real menus yet);
+            skipped images are recorded with their original URL and listed in the report.
     methods:
         generate_keywords: Generate keywords.
+        generate_keyword_profiles: Generate the named keyword profiles of this run.
         run: Start crawling.
-        _crawl_author_until_success: Retry crawling a single author until successful.
+        _crawl_author: Crawl a single author over the date window (optionally split into sub-ranges).
+        _crawl_author_until_success: Retry crawling a single search URL until successful.
         _handle_crawl_error: Error handling logic when an error occurs.
         _handle_error_single_account: Error handling when a single account encounters a loading error.
         _handle_error_multi_account: Error handling in multi-account mode when a loading error occurs.
         _reopen_context_and_test: Reopen context and test.
+        _switch_context: Swap in a standby context, or create a new one.
         _wait_and_reopen_context_first_account: Wait and reopen context.
         _create_new_context: Create a new context.
         crawl_author: Crawl author's tweets and detect loading errors.
@@ -44,9 +87,15 @@ class TwitterCrawler:
         _check_empty_state: Check if the page is empty.
         check_cell_divs: Check for loading errors.
         extract_tweet_id: Extract tweet ID.
+        extract_author_handle: Extract the author's handle.
         smooth_scroll: Scroll to load more tweets.
         generate_twitter_search_url: Generate Twitter search URL.
         download_image: Download image.
+        _select_media: Classify small previews and return the media worth downloading.
+        _submit_transcode: Queue a downloaded image for re-encoding.
+        _collect_transcodes: Record finished re-encodings in the database and the result stream.
+        _finish_transcoding: Wait for all queued re-encodings.
+        generate_reports: Generate one HTML file per event.
         generate_html: Generate HTML file.
     """
     # --------------------------
@@ -64,6 +113,36 @@ class TwitterCrawler:
 
     # First wait for 60 seconds, then 90 seconds for the second time (and thereafter)
     WAIT_SEQUENCE = [60, 90]
+
+    # How long a cached author search result stays valid (0 disables the cache)
+    SEARCH_CACHE_TTL_SECONDS = 6 * 60 * 60
+
+    # Maximum number of cached author search results, least recently used ones are evicted first
+    SEARCH_CACHE_MAX_ENTRIES = 5000
+
+    # Default per-author budgets, including retries; once one is used up the author is marked incomplete
+    AUTHOR_TIME_BUDGET_SECONDS = 600
+    AUTHOR_MAX_SCROLLS = 300
+    AUTHOR_MAX_TWEETS = 1000
+
+    # Memory watermarks: above these the page (JS heap) or the whole context (Chromium memory, PSS) is recycled
+    PAGE_HEAP_LIMIT_MB = 512
+    BROWSER_RSS_LIMIT_MB = 2048
+
+    # Memory allowed on top of BROWSER_RSS_LIMIT_MB for each idle standby context
+    STANDBY_CONTEXT_BUDGET_MB = 200
+
+    # While scrolling one author, check the page's JS heap every N scrolls
+    MEMORY_CHECK_INTERVAL = 20
+
+    # Date-window splitting: a sub-range returning at least HIGH tweets halves the next window,
+    # one returning at most LOW tweets doubles it
+    SPLIT_HIGH_WATER_TWEETS = 60
+    SPLIT_LOW_WATER_TWEETS = 10
+    MIN_SPLIT_WINDOW_DAYS = 1
+
+    # Quality of transcoded images (WebP / AVIF, 0-100)
+    TRANSCODE_QUALITY = 80
     
     logger = LoggerManager("scraper").get_logger()
 
@@ -73,13 +152,74 @@ class TwitterCrawler:
         download_dir="downloaded_images",
         headless=False,
         sessions_number=None,
-        custom_keywords=None
+        output_jsonl=None,
+        lean_profile=None,
+        custom_keywords=None,
+        keyword_profiles=None,
+        remove_duplicate_images=False,
+        cache_ttl=None,
+        prioritize_authors=True,
+        revisit_policy=None,
+        author_budget=None,
+        run_deadline_seconds=None,
+        standby_contexts=True,
+        preflight_accounts=True,
+        memory_limits=None,
+        split_window_days=None,
+        ocr_images=True,
+        media_variant="orig",
+        transcode_format=None,
+        preview_media=False
     ):
         self.output_html = output_html
+        self.result_stream = ResultStream(output_jsonl or Path(output_html).with_suffix(".jsonl"))
+        # Tweets already written to the stream in this run
+        self._streamed_tweet_ids = set()
+        # Author currently being crawled
+        self._current_author_url = None
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
 
         self.headless = headless
+        self.lean_profile = headless if lean_profile is None else lean_profile
+        # Per-instance browser memory / CPU, sampled between authors
+        self.usage_meter = BrowserUsageMeter()
+        self.remove_duplicate_images = remove_duplicate_images
+        self.cache_ttl = self.SEARCH_CACHE_TTL_SECONDS if cache_ttl is None else cache_ttl
+        self.prioritize_authors = prioritize_authors
+        self.revisit_policy = revisit_policy or {}
+        author_budget = author_budget or {}
+        self.author_time_budget = author_budget.get("seconds", self.AUTHOR_TIME_BUDGET_SECONDS)
+        self.author_max_scrolls = author_budget.get("scrolls", self.AUTHOR_MAX_SCROLLS)
+        self.author_max_tweets = author_budget.get("tweets", self.AUTHOR_MAX_TWEETS)
+        self.run_deadline_seconds = run_deadline_seconds
+        self.standby_contexts = standby_contexts
+        self.preflight_accounts = preflight_accounts
+        memory_limits = memory_limits or {}
+        self.page_heap_limit_mb = memory_limits.get("page_heap_mb", self.PAGE_HEAP_LIMIT_MB)
+        self.browser_rss_limit_mb = memory_limits.get("browser_rss_mb", self.BROWSER_RSS_LIMIT_MB)
+        self.split_window_days = split_window_days
+        self.ocr_images = ocr_images
+        for variant in (media_variant.values() if isinstance(media_variant, dict) else [media_variant]):
+            if variant not in MEDIA_VARIANTS:
+                raise ValueError(f"Unknown media variant: {variant}")
+        if transcode_format is not None and transcode_format not in TRANSCODE_FORMATS:
+            raise ValueError(f"Unknown transcode format: {transcode_format}")
+        if transcode_format is not None and not features.check(transcode_format):
+            self.logger.info(f"Pillow has no {transcode_format} encoder, images are kept as JPEG")
+            print(f"Pillow 不支援 {transcode_format}，圖片維持 JPEG 格式")
+            transcode_format = None
+        self.media_variant = media_variant
+        self.transcode_format = transcode_format
+        self.preview_media = preview_media
+        # Worker pool classifying previews and re-encoding downloaded images, started when first needed
+        self._media_executor = None
+        self._transcode_futures = []
+        self.transcoded_count = 0
+        self.transcoded_saved_bytes = 0
+        # Preview stage statistics of this run
+        self.preview_bytes = 0
+        self.skipped_media = 0
         self.ua = UserAgent()
 
         # Track the current account index
@@ -88,18 +228,55 @@ class TwitterCrawler:
         # Query results
         self.all_results = []
 
+        # Query time range, set in run()
+        self.until_ts = None
+        self.since_ts = None
+
+        # Budget tracking: absolute run deadline, start time of the current author, scrolls and tweets
+        # spent on it across retries and sub-ranges, and why it was cut short (None if crawled completely)
+        self._run_deadline = None
+        self._author_started_at = None
+        self._author_scrolls = 0
+        self._author_tweets = 0
+        self._incomplete_reason = None
+
+        # Window splitting: tweet IDs seen across the current author's sub-ranges (None when not splitting),
+        # and the number of tweets the last crawl_author() call inspected
+        self._window_tweet_ids = None
+        self._last_tweet_count = 0
+
+        # Result of a successful _reopen_context_and_test()
+        self._reopen_result = None
+
+        # Tweet / media store and author scheduler, opened in run()
+        self.db = None
+        self.scheduler = None
+
         # Playwright related
         self._playwright = None
         self.browser = None
         self.context = None
         self.page = None
+        self.context_pool = None
 
         # Accumulate error count (used to decide whether to wait 60 or 90 seconds)
         self.global_fail_count = 0
 
         self.storage_states = self.get_storage_states()
-        # generate keywords
-        self.KEYWORDS = self.generate_keywords(sessions_number, custom_keywords)
+        # generate keywords: one profile per event, searched together with the union of their keywords
+        self.keyword_profiles = self.generate_keyword_profiles(sessions_number, custom_keywords, keyword_profiles)
+        self.KEYWORDS = list(dict.fromkeys(kw for kws in self.keyword_profiles.values() for kw in kws))
+        # Keywords that only belong to one profile (e.g. FF44 vs the generic FF), used to tell events apart
+        self.specific_keywords = {
+            name: [
+                kw for kw in kws
+                if not any(kw in other for other_name, other in self.keyword_profiles.items() if other_name != name)
+            ]
+            for name, kws in self.keyword_profiles.items()
+        }
+
+        # Profiles matched by each downloaded image {path: [profile names]}
+        self.image_profiles = {}
 
     def get_storage_states(self):
         """
@@ -127,39 +304,131 @@ class TwitterCrawler:
 
         return keywords
 
+    def generate_keyword_profiles(self, sessions_number, custom_keywords, keyword_profiles):
+        """
+        Return {profile name: keywords}. Without keyword_profiles, the single profile is built
+        from sessions_number / custom_keywords like before.
+        A profile given without keywords whose name is FF<number> uses the default FF keywords of that session.
+        """
+        if not keyword_profiles:
+            name = f"FF{sessions_number}" if not custom_keywords else "custom"
+            return {name: self.generate_keywords(sessions_number, custom_keywords)}
+
+        profiles = {}
+        for name, keywords in keyword_profiles.items():
+            session_match = re.fullmatch(r"FF(\d+)", name.strip(), re.IGNORECASE)
+            if not keywords and session_match:
+                profiles[name] = self.generate_keywords(session_match.group(1), None)
+            elif any(kw.strip() for kw in keywords):
+                profiles[name] = self.generate_keywords(None, keywords)
+            else:
+                self.logger.info(f"Profile {name} has no keywords, skipped")
+                print(f"場次 {name} 沒有關鍵字，將略過")
+        return profiles or self.generate_keyword_profiles(sessions_number, custom_keywords, None)
+
     # --------------------------
     # Core: run
     # --------------------------
 
     def run(self):
-        db = DatabaseManager()
-        author_urls = db.get_all_author_urls()
+        self.db = DatabaseManager()
+        self.scheduler = AuthorScheduler(self.db, profile_key=self._profile_key(), **self.revisit_policy)
+        # Authors unfollowed since the last full follow-list sync are skipped
+        author_urls = self.db.get_all_author_urls(active_only=True)
+        dormant_urls = []
+        if self.prioritize_authors:
+            author_urls, dormant_urls = self.scheduler.plan(author_urls)
+            if dormant_urls:
+                self.logger.info(f"Skipping {len(dormant_urls)} dormant authors until their revisit time")
+                print(f"略過 {len(dormant_urls)} 位近期無品書的作者，將於之後的查詢再確認")
+
+        self.result_stream.open(self.keyword_profiles)
+        for url in dormant_urls:
+            self._write_author_record(url, {"author": url, "images": [], "profiles": {}}, "dormant")
 
         # Query time range
-        until_ts = int(time.time())
-        since_ts = until_ts - self.ONE_MONTH_SECONDS
+        self.until_ts = int(time.time())
+        self.since_ts = self.until_ts - self.ONE_MONTH_SECONDS
+        if self.run_deadline_seconds:
+            self._run_deadline = time.time() + self.run_deadline_seconds
 
-        # Initialize the browser
-        init_result=self.init_browser()
-        if init_result==False:
-            
-            return False
-        
         # Start crawling
-        for author_url in author_urls:
+        for position, author_url in enumerate(author_urls):
+            if self._deadline_reached():
+                deferred = author_urls[position:]
+                for url in deferred:
+                    self.scheduler.mark_incomplete(url)
+                    self._write_author_record(url, {"author": url, "images": [], "profiles": {}}, "deferred")
+                self.logger.info(f"Run deadline reached, deferring {len(deferred)} authors to the next run")
+                print(f"已達本次查詢時間上限，剩餘 {len(deferred)} 位作者將於下次優先查詢")
+                break
+
             author_id = author_url.replace("https://x.com/", "")
             self.logger.info(f"Preparing to search author : {author_id}")
             print(f"準備搜尋作者 : {author_id}")
 
-            search_url = self.generate_twitter_search_url(
-                self.KEYWORDS, author_id, until_ts, since_ts
-            )
-
-            # Keep trying until successful
-            self._crawl_author_until_success(search_url, author_url)
+            # Reuse a fresh cached result for the same author, keywords and date window
+            cached = self._get_cached_result(author_url)
+            if cached is not None:
+                self.all_results.append(cached)
+                self._write_author_record(author_url, cached, "cached")
+                self.logger.info(f"Using cached result for {author_id}")
+                print("使用快取結果，略過搜尋")
+                continue
 
-        # All authors processed => Output HTML
-        self.generate_html(self.all_results, self.output_html)
+            # The browser is only started once an author actually has to be crawled
+            if self.browser is None:
+                if self.preflight_accounts and self.storage_states:
+                    self.storage_states = LoginStatePreflight(
+                        headless=self.headless, user_agent_factory=lambda: self.ua.random
+                    ).run(self.storage_states)
+                init_result=self.init_browser()
+                if init_result==False:
+                    self.db.close()
+                    self.result_stream.close()
+                    return False
+
+            # Recycle the page / context between authors if memory has grown past the watermarks
+            self._check_memory_watermarks()
+
+            self._crawl_author(author_id, author_url)
+
+        # All authors processed => rebuild the results from the stream, group near-duplicate images,
+        # then output one HTML per event
+        self._finish_transcoding()
+        deduplicator = ImageDeduplicator(
+            self.db, remove_duplicates=self.remove_duplicate_images, trash_dir=self.download_dir / "duplicates_trash"
+        )
+        results = deduplicator.deduplicate_results(self.result_stream.read_results())
+        if deduplicator.removed:
+            # Local paths streamed earlier may point at removed files, tell readers where they went
+            self.result_stream.write({"type": "duplicates", "paths": deduplicator.removed})
+        self.result_stream.close()
+        # The report is written before OCR, so it is available even if OCR is slow or interrupted
+        self.generate_reports(results)
+        if self.ocr_images:
+            if self._deadline_reached():
+                self.logger.info("Run deadline reached, skipping OCR")
+                print("已達本次查詢時間上限，略過品書文字辨識，將於下次查詢時辨識")
+            else:
+                booths = OshinagakiOCR(self.db).index_images(
+                    [p for item in results for p in item["images"]], deadline=self._run_deadline
+                )
+                if booths:
+                    for item in results:
+                        item["booths"] = {str(p): booths.get(str(p), []) for p in item["images"]}
+                    # Rewrite the report with the booth numbers
+                    self.generate_reports(results)
+        self.db.close()
+
+        if self.browser is not None:
+            usage = self.usage_meter.summary()
+            profile = "lean" if self.lean_profile else "default"
+            self.logger.info(
+                f"Browser usage ({profile} profile, headless={self.headless}): "
+                f"peak memory {usage['peak_memory_mb']:.0f} MB, average CPU {usage['avg_cpu_percent']:.0f}%"
+            )
+            print(f"瀏覽器資源使用: 最高記憶體 {usage['peak_memory_mb']:.0f} MB，平均 CPU {usage['avg_cpu_percent']:.0f}%")
 
         # Close the browser
         self.close_browser()
@@ -167,6 +436,58 @@ class TwitterCrawler:
         self.logger.info("All authors processed, program finished.")
         print("所有作者處理完畢，程式結束。")
 
+    # --------------------------
+    # Core: Search one author
+    # --------------------------
+    def _crawl_author(self, author_id, author_url):
+        """
+        Crawl one author over the whole date window and record the result.
+        With split_window_days, the window is searched in consecutive sub-ranges from newest to oldest
+        (until: is exclusive and since: inclusive, so sub-ranges neither overlap nor leave gaps);
+        results are merged with tweet-id dedup, and each sub-range's size adapts to how many
+        tweets the previous one returned.
+        """
+        self._author_started_at = time.time()
+        self._author_scrolls = 0
+        self._author_tweets = 0
+        self._current_author_url = author_url
+        self._incomplete_reason = None
+
+        if not self.split_window_days:
+            search_url = self.generate_twitter_search_url(
+                self.KEYWORDS, author_id, self.until_ts, self.since_ts
+            )
+            # Keep trying until successful
+            author_name, images = self._crawl_author_until_success(search_url, author_url)
+            self._record_result(author_url, author_name, images)
+            return
+
+        self._window_tweet_ids = set()
+        merged_name = None
+        merged_images = []
+        window_days = self.split_window_days
+        until_ts = self.until_ts
+        while until_ts > self.since_ts:
+            since_ts = max(self.since_ts, until_ts - window_days * 86400)
+            search_url = self.generate_twitter_search_url(self.KEYWORDS, author_id, until_ts, since_ts)
+            author_name, images = self._crawl_author_until_success(search_url, author_url)
+            if author_name is not None:
+                merged_name = author_name or merged_name or ""
+            merged_images.extend(images)
+            if self._incomplete_reason:
+                break
+
+            # Adapt the next sub-range to how deep this one was
+            if self._last_tweet_count >= self.SPLIT_HIGH_WATER_TWEETS:
+                window_days = max(self.MIN_SPLIT_WINDOW_DAYS, window_days // 2)
+            elif self._last_tweet_count <= self.SPLIT_LOW_WATER_TWEETS:
+                window_days *= 2
+            self.logger.info(f"Sub-range returned {self._last_tweet_count} tweets, next window {window_days} days")
+            until_ts = since_ts
+
+        self._window_tweet_ids = None
+        self._record_result(author_url, merged_name, merged_images)
+
     # --------------------------
     # Core: Search until successful
     # --------------------------
@@ -176,8 +497,18 @@ class TwitterCrawler:
         => enter _handle_crawl_error() 
         => handle errors based on the number of accounts 
         => reopen the page / switch accounts / wait 60-90 seconds, then try again.
+        Returns (author_name, images) as returned by crawl_author().
+        Stops once the author's time budget or the run deadline is used up and returns ("", []),
+        with the author marked incomplete.
         """
         while True:
+            reason = self._budget_exceeded()
+            if reason:
+                self._incomplete_reason = reason
+                self.logger.info(f"Giving up on {fallback_author} for this run: {reason}")
+                print(f"此作者已用完查詢預算 ({reason})，標記為未完成")
+                return "", []
+
             # Random wait before each attempt
             sleep_sec = random.uniform(1.0, 3.0)
             self.logger.info(f"Preparing to search {search_url}, waiting for {sleep_sec:.1f} seconds...")
@@ -190,20 +521,18 @@ class TwitterCrawler:
             # (None, []) => Empty page
             # (author_name, [paths]) => Success
 
-            # As long as it's not (False, 1), it's considered "successful or acceptable", add the result and exit
+            # As long as it's not (False, 1), it's considered "successful or acceptable", return the result
             if author_name is False and images == 1:
                 self.logger.info("Detected loading error, entering error handling")
                 print("偵測到載入錯誤，進入錯誤處理...")
-                self._handle_crawl_error(search_url, fallback_author)
+                if self._handle_crawl_error(search_url, fallback_author):
+                    # A reopened context already crawled this search
+                    return self._reopen_result
             else:
                 # Considered successful or acceptable
-                self.all_results.append({
-                    "author": author_name if author_name else fallback_author,
-                    "images": images if isinstance(images, list) else []
-                })
                 self.logger.info("Author processed successfully")
                 print("此作者搜尋處理成功")
-                return
+                return author_name, images if isinstance(images, list) else []
 
     # --------------------------
     # Handling logic after a loading error occurs
@@ -221,15 +550,16 @@ class TwitterCrawler:
 
         Throughout the process, only the context is closed/reopened, not the entire browser.
         This function only performs one "round of attempts"; if it fails, it returns to the outer `_crawl_author_until_success()` function, and if an error occurs again, it will enter here again.
+        Returns True if a reopened context crawled the author successfully.
         """
 
         num_accounts = len(self.storage_states)
         if num_accounts <= 1:
             # Single account mode
-            self._handle_error_single_account(search_url, fallback_author, account_idx=0 if num_accounts == 1 else None)
+            return self._handle_error_single_account(search_url, fallback_author, account_idx=0 if num_accounts == 1 else None)
         else:
             # Multi-account mode
-            self._handle_error_multi_account(search_url, fallback_author)
+            return self._handle_error_multi_account(search_url, fallback_author)
 
     def _handle_error_single_account(self, search_url, fallback_author, account_idx):
         """
@@ -237,10 +567,13 @@ class TwitterCrawler:
         """
         # retry 3 times
         for _ in range(self.MAX_REOPEN_TIMES):
+            if self._budget_exceeded():
+                return False
             if self._reopen_context_and_test(search_url, fallback_author, account_idx):
-                return  
+                return True
         # if all fail => wait 60->90 seconds
         self._wait_and_reopen_context_first_account()
+        return False
         # After waiting, the function ends and returns to the outer _crawl_author_until_success to try again => 
         # if it fails again => it will enter here again
 
@@ -261,6 +594,9 @@ class TwitterCrawler:
             self.logger.info(f"Switching to account {acc_idx}...")
             print(f"切換到帳號 {acc_idx}...")
             for _ in range(self.MAX_REOPEN_TIMES):
+                if self._budget_exceeded():
+                    self.current_storage_index = acc_idx
+                    return False
                 if self._reopen_context_and_test(search_url, fallback_author, acc_idx):
                     success_account = acc_idx
                     break
@@ -271,26 +607,25 @@ class TwitterCrawler:
         if success_account is not None:
             # Success => Update current_storage_index
             self.current_storage_index = success_account
-            return
+            return True
         else:
             # All accounts failed => wait 60->90 seconds, then set the account index to 0
             self.current_storage_index = 0
             self._wait_and_reopen_context_first_account()
+            return False
 
     def _reopen_context_and_test(self, search_url, fallback_author, account_idx):
         """
         1) close_context()
-        2) Create a new context
-        3) Wait briefly, then call crawl_author() to test if it is still (False, 1) error
-        4) If not => return True indicating success; if still (False, 1) => return False
+        2) Swap in the account's standby context, or create a new context if there is none
+        3) If the context was created cold, wait briefly; then call crawl_author() to test if it is still (False, 1) error
+        4) If not => keep the result in _reopen_result and return True; if still (False, 1) => return False
         """
-        self.close_context()
-        self._create_new_context(account_idx)
-
-        wait_s = random.uniform(1, 2)
-        self.logger.info(f"Reinitialization complete, waiting for {wait_s:.1f} seconds before continuing...")
-        print(f"重新初始化完成，等待 {wait_s:.1f} 秒後繼續...")
-        time.sleep(wait_s)
+        if not self._switch_context(account_idx):
+            wait_s = random.uniform(1, 2)
+            self.logger.info(f"Reinitialization complete, waiting for {wait_s:.1f} seconds before continuing...")
+            print(f"重新初始化完成，等待 {wait_s:.1f} 秒後繼續...")
+            time.sleep(wait_s)
 
         # Test if the error still exists
         author_name, images = self.crawl_author(search_url)
@@ -303,23 +638,196 @@ class TwitterCrawler:
             self.logger.info("Successfully restarted, continuing...")
             print("重新啟動後成功，繼續進行...")
             # success
-            self.all_results.append({
-                "author": author_name if author_name else fallback_author,
-                "images": images if isinstance(images, list) else []
-            })
+            self._reopen_result = (author_name, images if isinstance(images, list) else [])
             return True
 
+    # --------------------------
+    # Results and search cache
+    # --------------------------
+    def _record_result(self, author_url, author_name, images):
+        """
+        Add a successful (or empty) author result, record it in the author's history
+        and store it in the search cache.
+        Incomplete results (budget used up) are kept in the report but deferred instead of cached.
+        """
+        images = images if isinstance(images, list) else []
+        result = {
+            "author": author_name if author_name else author_url,
+            "images": images,
+            "profiles": {str(p): self.image_profiles.get(str(p), []) for p in images},
+            "incomplete": self._incomplete_reason is not None
+        }
+        self.all_results.append(result)
+        if result["incomplete"]:
+            self.scheduler.mark_incomplete(author_url)
+            self._write_author_record(author_url, result, "incomplete")
+            return
+        self._write_author_record(author_url, result, "empty" if author_name is None else "complete")
+        self.scheduler.record(author_url, len(result["images"]), empty=author_name is None)
+        if self.cache_ttl > 0:
+            self.db.save_cached_search(
+                self._search_cache_key(author_url),
+                {"author": result["author"], "images": [str(p) for p in images], "profiles": result["profiles"]},
+                self.SEARCH_CACHE_MAX_ENTRIES
+            )
+
+    def _write_author_record(self, author_url, result, status):
+        """
+        Append the final status of an author, with its images, to the result stream
+        """
+        record = {
+            "type": "author",
+            "author_url": author_url,
+            "author": result["author"],
+            "status": status,
+            "images": [str(p) for p in result["images"]],
+            "profiles": result["profiles"]
+        }
+        if status == "incomplete":
+            record["reason"] = self._incomplete_reason
+        self.result_stream.write(record)
+
+    def _write_tweet_record(self, tweet_id, author_name, created_at, content, matched_keywords, matched_profiles, media):
+        """
+        Append a matching tweet to the result stream, once per run
+        """
+        if tweet_id in self._streamed_tweet_ids:
+            return
+        self._streamed_tweet_ids.add(tweet_id)
+        self.result_stream.write({
+            "type": "tweet",
+            "author_url": self._current_author_url,
+            "author": author_name,
+            "tweet_id": tweet_id,
+            "created_at": created_at,
+            "content": content,
+            "matched_keywords": matched_keywords,
+            "profiles": matched_profiles,
+            "media": [
+                {
+                    "url": item["url"],
+                    "variant": item["variant"],
+                    "skipped": item["skipped"],
+                    "local_path": item["local_path"],
+                    # Hash of the downloaded bytes, before any transcoding
+                    "sha256": item.get("sha256")
+                }
+                for item in media
+            ]
+        })
+
+    def _file_sha256(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _get_cached_result(self, author_url):
+        """
+        Return the cached result of this author, or None if it is missing, expired, or its images are gone.
+        Images removed as near-duplicates are replaced by the representative that was kept.
+        """
+        if self.cache_ttl <= 0:
+            return None
+        cached = self.db.get_cached_search(self._search_cache_key(author_url), self.cache_ttl)
+        if cached is None:
+            return None
+        images = []
+        profiles = {}
+        for path in cached["images"]:
+            resolved = path if os.path.exists(path) else self.db.resolve_image_alias(path)
+            if resolved is None or not os.path.exists(resolved):
+                return None
+            if Path(resolved) not in images:
+                images.append(Path(resolved))
+            merged = profiles.setdefault(resolved, [])
+            merged.extend(p for p in cached["profiles"].get(path, []) if p not in merged)
+        return {"author": cached["author"], "images": images, "profiles": profiles, "incomplete": False}
+
+    def _search_cache_key(self, author_url):
+        """
+        Build the cache key from the canonical author, the normalized keyword set of each profile
+        and the date window. The window uses the same day granularity as the search URL.
+        The media settings are part of the key, since cached images were stored with them.
+        """
+        author = author_url.replace("https://x.com/", "").strip("/").lower()
+        keywords = self._normalized_profiles()
+        until_date = datetime.fromtimestamp(self.until_ts).strftime('%Y-%m-%d')
+        since_date = datetime.fromtimestamp(self.since_ts).strftime('%Y-%m-%d')
+        media = [self.media_variant, self.transcode_format]
+        return json.dumps([author, keywords, since_date, until_date, media], ensure_ascii=False, sort_keys=True)
+
+    def _normalized_profiles(self):
+        return sorted(
+            [name, sorted({kw.strip().casefold() for kw in kws if kw.strip()})]
+            for name, kws in self.keyword_profiles.items()
+        )
+
+    def _profile_key(self):
+        """
+        Key of the author history used by the scheduler: the normalized keyword set of every profile,
+        so an FF run and a custom keyword run each keep their own hit / miss history
+        """
+        return json.dumps(self._normalized_profiles(), ensure_ascii=False)
+
+    # --------------------------
+    # Budgets and run deadline
+    # --------------------------
+    def _deadline_reached(self):
+        return self._run_deadline is not None and time.time() >= self._run_deadline
+
+    def _remaining_budget_seconds(self):
+        """
+        Seconds left before the current author's time budget or the run deadline runs out
+        """
+        remaining = self.author_time_budget - (time.time() - self._author_started_at)
+        if self._run_deadline is not None:
+            remaining = min(remaining, self._run_deadline - time.time())
+        return remaining
+
+    def _budget_exceeded(self):
+        """
+        Return why the current author has to stop (run deadline, time, scroll or tweet budget), or None
+        """
+        if self._deadline_reached():
+            return "run deadline"
+        if time.time() - self._author_started_at >= self.author_time_budget:
+            return "time budget"
+        if self._author_scrolls >= self.author_max_scrolls:
+            return "scroll budget"
+        if self._author_tweets >= self.author_max_tweets:
+            return "tweet budget"
+        return None
+
     def _wait_and_reopen_context_first_account(self):
         """
         Wait for 60->90 seconds, then reopen the context with account 0.
+        The wait is shortened so that it never runs past the author's time budget or the run deadline.
         """
         self.global_fail_count += 1
         wait_sec = self.WAIT_SEQUENCE[0] if self.global_fail_count == 1 else self.WAIT_SEQUENCE[1]
+        wait_sec = max(0, min(wait_sec, self._remaining_budget_seconds()))
         self.logger.info(f"All account tests failed, waiting for {wait_sec} seconds before returning to the initial account...")
         print(f"所有帳號測試失敗，等待 {wait_sec} 秒後回到初始帳號...")
         time.sleep(wait_sec)
+        self._switch_context(0)
+
+    def _switch_context(self, account_idx):
+        """
+        Replace the current context with the account's warm standby context and start warming
+        a replacement, or fall back to creating a new context.
+        Returns True if a standby context was used.
+        """
         self.close_context()
-        self._create_new_context(0)
+        standby = self.context_pool.acquire(account_idx) if self.context_pool else None
+        if standby is None:
+            self._create_new_context(account_idx)
+            return False
+        self.context, self.page = standby
+        self.context_pool.warm(account_idx)
+        self.logger.info(f"Switched to standby context (account index={account_idx}).")
+        print(f"已切換至預備的瀏覽器 (帳號索引={account_idx})")
+        return True
 
     def _create_new_context(self, account_idx):
         """
@@ -341,7 +849,8 @@ class TwitterCrawler:
 
         self.context = self.browser.new_context(
             user_agent=self.ua.random,
-            storage_state=storage_state_file
+            storage_state=storage_state_file,
+            **context_options(self.lean_profile)
         )
         self.page = self.context.new_page()
         self.logger.info(f"Browser context initialized (account index={account_idx}).")
@@ -372,11 +881,16 @@ class TwitterCrawler:
         """
         1. page.goto(search_url)
         2. Check for cellInnerDiv or emptyState, otherwise consider it an error -> return (False, 1)
-        3. Parse tweets (article[data-testid="tweet"])
+        3. Parse tweets (article[data-testid="tweet"]) and store them with their media in the database
         4. If there are keywords + images => download
         5. Return (author_name, downloaded_paths)
         6. If the first tweet after scrolling remains unchanged and the duplicate count reaches the limit, consider it the end
+        7. If the author's time / scroll / tweet budget runs out, stop early and return the partial result
+        8. If the page's JS heap grows past the watermark, continue on a fresh page below the oldest tweet seen
         """
+        self._last_tweet_count = 0
+        # Scrolls and tweets of this call are added to the author's budget counters
+        tweets_before = self._author_tweets
         self.page.goto(search_url)
 
         # Wait for 5 seconds to see if cellInnerDiv can be loaded
@@ -405,8 +919,16 @@ class TwitterCrawler:
         author_name = ""
         duplicate_count = 0
         last_seen_tweet_id = None 
+        scroll_count = 0
 
         while duplicate_count < self.DUPLICATE_THRESHOLD:
+            reason = self._budget_exceeded()
+            if reason:
+                self._incomplete_reason = reason
+                self.logger.info(f"Stopping author early ({reason}), keeping the partial result")
+                print(f"已達查詢預算 ({reason})，保留目前結果")
+                break
+
             articles = self.page.query_selector_all('article[data-testid="tweet"]')
 
             if not articles:
@@ -436,6 +958,12 @@ class TwitterCrawler:
                     self.logger.info(f"Tweet {raw_tweet_id} has already been processed, skipping")
                     continue
 
+                # Already handled in another date sub-range of this author
+                if self._window_tweet_ids is not None:
+                    if raw_tweet_id in self._window_tweet_ids:
+                        continue
+                    self._window_tweet_ids.add(raw_tweet_id)
+
                 current_tweet_ids.add(raw_tweet_id)
 
                 # get author name
@@ -452,23 +980,59 @@ class TwitterCrawler:
                     lines = [l.strip() for l in text_div.inner_text().splitlines() if l.strip()]
                     content = "\n".join(lines)
 
+                # get tweet time
+                time_el = article.query_selector('time')
+                created_at = time_el.get_attribute("datetime") if time_el else ""
+
                 self.logger.info(f"[New Tweet] tweet_id={raw_tweet_id}, author={author_name}")
                 for line in content.splitlines():
                     self.logger.info(f"Content: {line}")
 
-                # Check if it contains keywords, if so, then check if there are images
-                if any(re.search(rf"{re.escape(k)}", content) for k in self.KEYWORDS):
-                    images = article.query_selector_all('div[data-testid="tweetPhoto"] img')
-                    if images:
-                        for idx, img_el in enumerate(images, start=1):
-                            img_url = img_el.get_attribute("src")
-                            if img_url:
-                                img_url = re.sub(r"\?.*", "", img_url) + "?format=jpg&name=orig"
-                                local_path = self.download_image(img_url, author_name, idx)
-                                downloaded_paths.append(local_path)
+                img_urls = []
+                for img_el in article.query_selector_all('div[data-testid="tweetPhoto"] img'):
+                    img_url = img_el.get_attribute("src")
+                    if img_url:
+                        img_urls.append(media_url(img_url, "orig"))
+                # The original URL is recorded even when a smaller variant is downloaded
+                media = [
+                    {"url": img_url, "local_path": None, "variant": None, "skipped": False}
+                    for img_url in img_urls
+                ]
+
+                # Check which keywords (and so which profiles) it contains, if any, then check if there are images
+                matched_keywords = [k for k in self.KEYWORDS if self._keyword_in(k, content)]
+                matched_profiles = self._match_profiles(matched_keywords)
+                matched = bool(matched_profiles)
+                if matched:
+                    if media:
+                        variant = self._media_variant_for(matched_profiles)
+                        selected = self._select_media(media) if self.preview_media else media
+                        for idx, item in enumerate(media, start=1):
+                            if item not in selected:
+                                item["skipped"] = True
+                                continue
+                            local_path = self.download_image(media_url(item["url"], variant), author_name, idx, raw_tweet_id)
+                            item["variant"] = variant
+                            item["sha256"] = self._file_sha256(local_path)
+                            if self.transcode_format:
+                                self._submit_transcode(local_path)
+                            item["local_path"] = str(local_path)
+                            self.image_profiles[str(local_path)] = matched_profiles
+                            downloaded_paths.append(local_path)
                     else:
                         self.logger.info("This tweet contains keywords but no images.")
 
+                self.db.save_tweet(
+                    raw_tweet_id, self.extract_author_handle(article), author_name,
+                    content, created_at, matched, media, matched_profiles
+                )
+                if matched:
+                    self._write_tweet_record(
+                        raw_tweet_id, author_name, created_at, content, matched_keywords, matched_profiles, media
+                    )
+                # After the tweet is stored, so that finished re-encodings can repoint its media
+                self._collect_transcodes()
+
             if first_tweet_id == last_seen_tweet_id and not is_first_process:
                 duplicate_count += 1
                 self.logger.info(f"First tweet after scrolling remains unchanged, duplicate count: {duplicate_count}/{self.DUPLICATE_THRESHOLD}")
@@ -480,12 +1044,28 @@ class TwitterCrawler:
                 # Update the last seen tweet ID
                 last_seen_tweet_id = first_tweet_id 
                 # Update the processed tweet IDs
+                self._author_tweets += len(current_tweet_ids - processed_tweet_ids)
                 processed_tweet_ids.update(current_tweet_ids)  
                 is_first_process = False
 
             # Scroll to load more tweets
             self.smooth_scroll(self.page)
+            scroll_count += 1
+            self._author_scrolls += 1
+
+            # The timeline keeps DOM, media and JS heap of everything scrolled past,
+            # so on a long timeline switch to a fresh page that starts below the oldest tweet seen
+            if (scroll_count % self.MEMORY_CHECK_INTERVAL == 0 and processed_tweet_ids
+                    and self._page_heap_mb() > self.page_heap_limit_mb):
+                oldest_id = min(processed_tweet_ids, key=int)
+                # processed_tweet_ids is kept, so a tweet seen before the switch is never handled twice
+                is_first_process = True
+                duplicate_count = 0
+                last_seen_tweet_id = None
+                if not self._continue_on_fresh_page(search_url, oldest_id):
+                    break
 
+        self._last_tweet_count = self._author_tweets - tweets_before
         self.logger.info("Author query completed")
         print("作者查詢完成")
         return author_name, downloaded_paths 
@@ -500,16 +1080,86 @@ class TwitterCrawler:
         if self.browser:
             self.close_browser()
 
-        self.browser = self._playwright.chromium.launch(headless=self.headless)
+        self.browser = launch_browser(self._playwright.chromium, headless=self.headless, lean=self.lean_profile)
         init_result=self._create_new_context(self.current_storage_index)
         if init_result==False:
             print("初始化瀏覽器失敗")
             self.close_browser()
             self.stop_playwright()
             return False
+        if self.standby_contexts:
+            self.context_pool = StandbyContextPool(
+                self.browser, self.storage_states, lambda: self.ua.random, context_options(self.lean_profile)
+            )
+            for account_idx in range(len(self.storage_states)):
+                self.context_pool.warm(account_idx)
         self.logger.info("Browser initialization complete.")
         print("瀏覽器初始化完成。")
 
+    # --------------------------
+    # Memory watermarks
+    # --------------------------
+    def _page_heap_mb(self) -> float:
+        """
+        Used JS heap of the current page in MB (Chromium only, 0 if unavailable)
+        """
+        try:
+            used = self.page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0")
+        except Exception:
+            return 0
+        return used / (1024 * 1024)
+
+    def _recycle_page(self):
+        """
+        Replace the current page with a new one in the same context, releasing its DOM and JS heap
+        """
+        if self.page:
+            self.page.close()
+        self.page = self.context.new_page()
+
+    def _check_memory_watermarks(self):
+        """
+        Between authors: recycle the whole context if the browser memory is over the watermark,
+        otherwise recycle the page if its JS heap is over the watermark.
+        The browser total includes the idle standby contexts, which are budgeted on top of the watermark.
+        """
+        usage = self.usage_meter.sample()
+        memory_mb = usage["memory_mb"]
+        standby_count = len(self.context_pool.standby) if self.context_pool else 0
+        limit_mb = self.browser_rss_limit_mb + standby_count * self.STANDBY_CONTEXT_BUDGET_MB
+        self.logger.info(f"Browser usage: memory {memory_mb:.0f} MB, CPU {usage['cpu_percent']:.0f}%")
+        if memory_mb > limit_mb:
+            self.logger.info(f"Browser memory {memory_mb:.0f} MB over {limit_mb} MB, recycling context")
+            print(f"瀏覽器記憶體使用 {memory_mb:.0f} MB，重新建立瀏覽器環境")
+            self._switch_context(self.current_storage_index)
+            return
+        heap_mb = self._page_heap_mb()
+        if heap_mb > self.page_heap_limit_mb:
+            self.logger.info(f"Page JS heap {heap_mb:.0f} MB over {self.page_heap_limit_mb} MB, recycling page")
+            self._recycle_page()
+
+    def _continue_on_fresh_page(self, search_url, oldest_id):
+        """
+        Recycle the page and load the same search restricted to tweets older than oldest_id.
+        The search uses the Latest tab, which lists tweets newest first, so every tweet newer than
+        oldest_id has already been rendered on the old page and nothing is skipped.
+        Returns False if there is nothing more to load.
+        """
+        self.logger.info(f"Page JS heap over {self.page_heap_limit_mb} MB, continuing below tweet {oldest_id} on a new page")
+        print("頁面記憶體過高，於新頁面接續查詢")
+        self._recycle_page()
+        self.page.goto(f"{search_url} max_id:{int(oldest_id) - 1}")
+        try:
+            self.page.wait_for_selector('div[data-testid="cellInnerDiv"]', timeout=5000)
+        except:
+            if not self._check_empty_state():
+                self._incomplete_reason = "continuation failed"
+            return False
+        if not self.check_cell_divs(self.page):
+            self._incomplete_reason = "continuation failed"
+            return False
+        return True
+
     def close_context(self):
         if self.page:
             self.page.close()
@@ -520,6 +1170,9 @@ class TwitterCrawler:
 
     def close_browser(self):
         self.close_context()
+        if self.context_pool:
+            self.context_pool.close_all()
+            self.context_pool = None
         if self.browser:
             self.browser.close()
             self.browser = None
@@ -564,6 +1217,15 @@ class TwitterCrawler:
                 return match.group(1)
         return ""
 
+    def extract_author_handle(self, article: ElementHandle) -> str:
+        link = article.query_selector('a[href*="/status/"]')
+        if link:
+            href = link.get_attribute("href") or ""
+            match = re.match(r"/([^/]+)/status/\d+", href)
+            if match:
+                return match.group(1)
+        return ""
+
     def smooth_scroll(self, page: Page):
         self.logger.info("Scrolling the page...")
         vh = page.evaluate("window.innerHeight")
@@ -573,15 +1235,20 @@ class TwitterCrawler:
             time.sleep(random.uniform(0.1, 0.5))
 
     def generate_twitter_search_url(self, keywords, author, until_ts, since_ts):
+        """
+        Search URL on the Latest tab (f=live): results are in time order, which the max_id continuation
+        relies on. The query is the last parameter so that operators can be appended to it.
+        """
         until_date = datetime.fromtimestamp(until_ts).strftime('%Y-%m-%d')
         since_date = datetime.fromtimestamp(since_ts).strftime('%Y-%m-%d')
         kq = " OR ".join([f'"{kw}"' for kw in keywords])
-        return (f"https://x.com/search?q=({kq}) (from:{author}) "
+        return (f"https://x.com/search?f=live&q=({kq}) (from:{author}) "
                 f"until:{until_date} since:{since_date}")
 
-    def download_image(self, img_url: str, author: str, index: int) -> Path:
+    def download_image(self, img_url: str, author: str, index: int, tweet_id: str = "") -> Path:
         safe_author = re.sub(r"[^a-zA-Z0-9_\-]+", "_", author) if author else "unknown"
-        filename = f"{safe_author}_{index}.jpg"
+        # The tweet ID keeps images of different tweets by the same author from overwriting each other
+        filename = f"{safe_author}_{tweet_id}_{index}.jpg" if tweet_id else f"{safe_author}_{index}.jpg"
         local_path = self.download_dir / filename
         max_retries = 3
         header = {"User-Agent": self.ua.random}
@@ -610,23 +1277,188 @@ class TwitterCrawler:
 
         return local_path
 
-    def generate_html(self, results: list[dict], output_file: str):
+    def _media_variant_for(self, profiles) -> str:
+        """
+        Size variant to download for a tweet matching the given profiles
+        """
+        if isinstance(self.media_variant, dict):
+            return largest_variant(self.media_variant.get(p, "orig") for p in profiles)
+        return self.media_variant
+
+    def _media_pool(self) -> ProcessPoolExecutor:
+        """
+        Worker pool shared by preview classification and transcoding
+        """
+        if self._media_executor is None:
+            self._media_executor = ProcessPoolExecutor()
+        return self._media_executor
+
+    def _select_media(self, media: list[dict]) -> list[dict]:
+        """
+        Fetch the small preview of every image of a tweet, classify the previews in the worker pool
+        and return the media items that are likely oshinagaki.
+        Images whose preview cannot be fetched are kept, so nothing is lost to a network error.
+        """
+        previews = {}
+        for idx, item in enumerate(media):
+            try:
+                r = requests.get(media_url(item["url"], PREVIEW_VARIANT), timeout=10, headers={"User-Agent": self.ua.random})
+                r.raise_for_status()
+                previews[idx] = r.content
+            except requests.exceptions.RequestException as e:
+                self.logger.info(f"Unable to fetch preview of {item['url']}: {e}")
+        self.preview_bytes += sum(len(data) for data in previews.values())
+
+        selected = [item for idx, item in enumerate(media) if idx not in previews]
+        for idx, likely, details in self._media_pool().map(classify_preview, previews, previews.values()):
+            if likely:
+                selected.append(media[idx])
+            else:
+                self.skipped_media += 1
+                self.logger.info(f"Skipping {media[idx]['url']}, preview does not look like an oshinagaki: {details}")
+        return selected
+
+    def _submit_transcode(self, local_path: Path):
+        """
+        Queue a downloaded image for re-encoding in a worker process.
+        The JPEG path is recorded until the re-encoded file exists, see _collect_transcodes().
+        """
+        if not local_path.exists():
+            return
+        target = local_path.with_suffix(TRANSCODE_FORMATS[self.transcode_format])
+        self._transcode_futures.append(self._media_pool().submit(
+            transcode_image, str(local_path), str(target), self.transcode_format, self.TRANSCODE_QUALITY
+        ))
+
+    def _collect_transcodes(self, wait=False):
+        """
+        Handle finished re-encodings (all of them if wait is set): the JPEG is replaced by the new file
+        in the database (as an image alias, which also serves cached results) and a transcoded record
+        tells stream readers the new path. Images that fail to re-encode keep their JPEG.
+        """
+        pending = []
+        paths = {}
+        for future in self._transcode_futures:
+            if not wait and not future.done():
+                pending.append(future)
+                continue
+            src, dst, saved_bytes = future.result()
+            if dst is None:
+                self.logger.info(f"Unable to transcode {src}, keeping the original image")
+                continue
+            self.db.save_image_alias(src, dst)
+            paths[src] = dst
+            self.transcoded_count += 1
+            self.transcoded_saved_bytes += saved_bytes
+        self._transcode_futures = pending
+        if paths:
+            self.result_stream.write({"type": "transcoded", "paths": paths})
+
+    def _finish_transcoding(self):
+        """
+        Wait for every queued re-encoding and shut the media worker pool down
+        """
+        if self.skipped_media:
+            self.logger.info(f"Skipped {self.skipped_media} images that do not look like oshinagaki "
+                             f"(previews: {self.preview_bytes / (1024 * 1024):.1f} MB)")
+            print(f"略過 {self.skipped_media} 張不像品書的圖片，已記錄於資料庫，之後仍可下載")
+        if self._media_executor is None:
+            return
+        self._collect_transcodes(wait=True)
+        self._media_executor.shutdown()
+        self._media_executor = None
+        if not self.transcoded_count:
+            return
+        saved_mb = self.transcoded_saved_bytes / (1024 * 1024)
+        self.logger.info(f"Transcoded {self.transcoded_count} images to {self.transcode_format}, saved {saved_mb:.1f} MB")
+        print(f"已將 {self.transcoded_count} 張圖片轉為 {self.transcode_format}，節省 {saved_mb:.1f} MB")
+
+    @staticmethod
+    def _keyword_in(keyword: str, content: str) -> bool:
+        """
+        Substring match, except that a keyword ending in a number must not be followed by another digit
+        (so FF4 does not match FF44)
+        """
+        boundary = r"(?!\d)" if keyword[-1:].isdigit() else ""
+        return re.search(rf"{re.escape(keyword)}{boundary}", content) is not None
+
+    def _match_profiles(self, matched_keywords: list[str]) -> list[str]:
+        """
+        Profiles a tweet belongs to. Profiles are matched by their own specific keywords;
+        only a tweet that contains nothing but shared keywords (e.g. just "FF") is tagged with
+        every profile sharing them, since it cannot be attributed to one event.
+        """
+        specific = [
+            name for name, keywords in self.specific_keywords.items()
+            if any(k in matched_keywords for k in keywords)
+        ]
+        if specific:
+            return specific
+        return [
+            name for name, keywords in self.keyword_profiles.items()
+            if any(k in matched_keywords for k in keywords)
+        ]
+
+    def generate_reports(self, results: list[dict]):
+        """
+        Write output_html for a single profile, or one output_<profile>.html per event when several profiles are searched
+        """
+        if len(self.keyword_profiles) == 1:
+            self.generate_html(results, self.output_html)
+            return
+        base = Path(self.output_html)
+        used_names = set()
+        for idx, name in enumerate(self.keyword_profiles, start=1):
+            profile_results = [
+                {
+                    **item,
+                    "images": [p for p in item["images"] if name in item["profiles"].get(str(p), [])],
+                    "skipped_media": [m for m in item.get("skipped_media", []) if name in m["profiles"]]
+                }
+                for item in results
+            ]
+            # \w is Unicode-aware, so CJK event names such as 開拓動漫祭 are kept in the file name
+            safe_name = re.sub(r"[^\w\-]+", "_", name).strip("_") or f"profile{idx}"
+            if safe_name.casefold() in used_names:
+                safe_name = f"{safe_name}_{idx}"
+            used_names.add(safe_name.casefold())
+            self.generate_html(profile_results, str(base.with_name(f"{base.stem}_{safe_name}{base.suffix}")), title=name)
+
+    def generate_html(self, results: list[dict], output_file: str, title=None):
+        heading = f"爬取結果 - {title}" if title else "爬取結果"
         html_lines = [
             "<html><head><meta charset='utf-8'><title>抓取結果</title></head><body>",
-            "<h1>爬取結果</h1>"
+            f"<h1>{heading}</h1>"
         ]
         for item in results:
             author = item["author"]
             images = item["images"]
             html_lines.append(f"<h2>作者: {author}</h2>")
-            if not images:
+            if item.get("incomplete"):
+                html_lines.append("<p>此作者本次查詢未完成，將於下次優先查詢</p>")
+            if item.get("dormant"):
+                html_lines.append("<p>此作者近期以相同關鍵字皆無品書，本次略過，將於之後的查詢再確認</p>")
+                continue
+            skipped_media = item.get("skipped_media", [])
+            if not images and not skipped_media:
                 html_lines.append("<p>沒有找到任何圖片</p>")
                 continue
             for img_path in images:
                 rel_path = os.path.relpath(img_path, start='.')
+                booths = item.get("booths", {}).get(str(img_path))
+                if booths:
+                    html_lines.append(f"<p>攤位: {', '.join(booths)}</p>")
                 html_lines.append(
                     f"<div><img src='{rel_path}' style='max-width:600px;'/></div>"
                 )
+            if skipped_media:
+                # Previews judged not to be oshinagaki, shown small so a wrong guess is easy to spot
+                html_lines.append(f"<p>預覽判定不像品書、未下載的圖片 ({len(skipped_media)} 張):</p>")
+                for media in skipped_media:
+                    html_lines.append(
+                        f"<div><a href='{media['url']}'><img src='{media_url(media['url'], PREVIEW_VARIANT)}' "
+                        f"style='max-width:200px;'/></a> <a href='{media['url']}'>原圖</a></div>"
+                    )
         html_lines.append("</body></html>")
 
         with open(output_file, "w", encoding="utf-8") as f:
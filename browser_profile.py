@@ -0,0 +1,140 @@
+import time
+import psutil
+from playwright.sync_api import BrowserType
+
+# Chromium flags of the lean crawl profile: no GPU / software rasterizer, small caches,
+# and no background services (sync, component updates, translate, media router...)
+LEAN_LAUNCH_ARGS = [
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-breakpad",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,BackForwardCache,AutofillServerCommunication",
+    "--no-first-run",
+    "--mute-audio",
+    "--disk-cache-size=33554432",
+    "--media-cache-size=1048576",
+]
+
+# Executable names of Chromium processes (browser, GPU, network and renderer processes)
+CHROMIUM_PROCESS_NAMES = ("chrome", "chromium", "headless_shell")
+
+# Smaller than Playwright's default 1280x720 width, but tall enough that the timeline
+# still renders several cellInnerDiv per screen for check_cell_divs and scrolling
+LEAN_VIEWPORT = {"width": 1000, "height": 900}
+
+
+def launch_browser(browser_type: BrowserType, headless=False, lean=False):
+    """
+    Launch Chromium, with the lean crawl profile's flags if lean is set
+    """
+    if lean:
+        return browser_type.launch(headless=headless, args=LEAN_LAUNCH_ARGS)
+    return browser_type.launch(headless=headless)
+
+
+def context_options(lean=False) -> dict:
+    """
+    Extra browser.new_context() options of the profile
+    """
+    return {"viewport": LEAN_VIEWPORT} if lean else {}
+
+
+class BrowserUsageMeter:
+    """
+    BrowserUsageMeter measures the memory and CPU use of the browser, i.e. the Chromium processes
+    started by this program. The Playwright driver and worker processes (image hashing, OCR,
+    transcoding) are not counted. Memory is PSS where the OS provides it (shared pages are split
+    between the processes sharing them instead of being counted once per process), else USS, else RSS.
+    methods:
+        sample: Current memory in MB and CPU percent (of one core) since the previous sample.
+        summary: Peak memory and average CPU over all samples.
+    """
+
+    def __init__(self):
+        self._last_cpu = None
+        self._last_time = None
+        self.peak_memory_mb = 0.0
+        self._cpu_samples = []
+
+    def _browser_processes(self):
+        return [
+            child for child in psutil.Process().children(recursive=True)
+            if any(name in self._process_name(child) for name in CHROMIUM_PROCESS_NAMES)
+        ]
+
+    @staticmethod
+    def _process_name(process) -> str:
+        try:
+            return process.name().lower()
+        except psutil.Error:
+            return ""
+
+    @staticmethod
+    def _memory(process) -> int:
+        try:
+            info = process.memory_full_info()
+        except psutil.AccessDenied:
+            return process.memory_info().rss
+        return getattr(info, "pss", None) or getattr(info, "uss", None) or info.rss
+
+    def sample(self) -> dict:
+        memory = 0
+        cpu = 0.0
+        for child in self._browser_processes():
+            try:
+                memory += self._memory(child)
+                times = child.cpu_times()
+                cpu += times.user + times.system
+            except psutil.Error:
+                continue
+        now = time.time()
+        cpu_percent = 0.0
+        if self._last_time is not None and now > self._last_time:
+            # Exited children drop out of the total, so clamp at 0
+            cpu_percent = max(0.0, (cpu - self._last_cpu) / (now - self._last_time) * 100)
+            self._cpu_samples.append(cpu_percent)
+        self._last_cpu = cpu
+        self._last_time = now
+
+        memory_mb = memory / (1024 * 1024)
+        self.peak_memory_mb = max(self.peak_memory_mb, memory_mb)
+        return {"memory_mb": memory_mb, "cpu_percent": cpu_percent}
+
+    def summary(self) -> dict:
+        avg_cpu = sum(self._cpu_samples) / len(self._cpu_samples) if self._cpu_samples else 0.0
+        return {"peak_memory_mb": self.peak_memory_mb, "avg_cpu_percent": avg_cpu}
+
+
+def measure_profile(headless: bool, lean: bool, url="https://x.com/", seconds=20) -> dict:
+    """
+    Launch one browser instance with the given profile, keep url open for a while
+    and return its peak memory and average CPU
+    """
+    from playwright.sync_api import sync_playwright
+
+    meter = BrowserUsageMeter()
+    with sync_playwright() as p:
+        browser = launch_browser(p.chromium, headless=headless, lean=lean)
+        page = browser.new_context(**context_options(lean)).new_page()
+        meter.sample()
+        page.goto(url)
+        end = time.time() + seconds
+        while time.time() < end:
+            page.wait_for_timeout(1000)
+            meter.sample()
+        browser.close()
+    return meter.summary()
+
+
+if __name__ == "__main__":
+    # Compare the per-instance footprint of the default and lean profiles
+    for headless, lean in [(False, False), (True, False), (True, True)]:
+        usage = measure_profile(headless, lean)
+        print(f"headless={headless}, lean={lean}: "
+              f"peak memory {usage['peak_memory_mb']:.0f} MB, average CPU {usage['avg_cpu_percent']:.0f}%")
@@ -0,0 +1,80 @@
+from pathlib import Path
+from playwright.sync_api import Browser
+from logger import LoggerManager
+
+
+class StandbyContextPool:
+    """
+    StandbyContextPool keeps one idle, pre-loaded browser context per account,
+    so that a failing context can be swapped for an already booted X app instead of a cold start.
+    args:
+        browser: The browser the standby contexts are created on.
+        storage_states: Storage state (cookie) files, indexed like TwitterCrawler.storage_states.
+        user_agent_factory: Callable returning the user agent of a new context.
+        context_options: Extra browser.new_context() options (e.g. the lean profile's viewport).
+    methods:
+        warm: Create a standby context for an account and start loading the X app in it.
+        acquire: Take the standby context of an account, if one is ready.
+        close_all: Close every standby context.
+    """
+    # Page loaded in standby contexts so the X app, its scripts and the session are ready
+    WARM_URL = "https://x.com/home"
+
+    logger = LoggerManager("scraper").get_logger()
+
+    def __init__(self, browser: Browser, storage_states: list[str], user_agent_factory, context_options=None):
+        self.browser = browser
+        self.storage_states = storage_states
+        self.user_agent_factory = user_agent_factory
+        self.context_options = context_options or {}
+        # account index => (context, page)
+        self.standby = {}
+
+    def warm(self, account_idx: int):
+        """
+        Create the standby context of an account if it has none.
+        Navigation only waits for the first response (wait_until="commit"), so the rest
+        of the app keeps loading in the browser while crawling continues on the active page.
+        """
+        if account_idx in self.standby:
+            return
+        if not (0 <= account_idx < len(self.storage_states)) or not Path(self.storage_states[account_idx]).exists():
+            return
+        context = None
+        try:
+            context = self.browser.new_context(
+                user_agent=self.user_agent_factory(),
+                storage_state=self.storage_states[account_idx],
+                **self.context_options
+            )
+            page = context.new_page()
+            page.goto(self.WARM_URL, wait_until="commit")
+        except Exception as e:
+            self.logger.info(f"Unable to warm up standby context (account index={account_idx}): {e}")
+            if context:
+                context.close()
+            return
+        self.standby[account_idx] = (context, page)
+        self.logger.info(f"Standby context warming up (account index={account_idx}).")
+
+    def acquire(self, account_idx: int):
+        """
+        Return (context, page) of the account's standby context and remove it from the pool,
+        or None if there is no usable standby
+        """
+        entry = self.standby.pop(account_idx, None)
+        if entry is None:
+            return None
+        context, page = entry
+        if page.is_closed():
+            context.close()
+            return None
+        return context, page
+
+    def close_all(self):
+        for context, page in self.standby.values():
+            try:
+                context.close()
+            except Exception as e:
+                self.logger.info(f"Error while closing standby context: {e}")
+        self.standby = {}
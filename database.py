@@ -1,8 +1,10 @@
+import json
 import sqlite3
+import time
 
 class DatabaseManager:
     """
-    Manage the SQLite database for Twitter author URLs
+    Manage the SQLite database for Twitter author URLs, crawled tweets and image indexes
     """
 
     def __init__(self, db_path="twitter_authors.db"):
@@ -16,7 +18,7 @@ class DatabaseManager:
 
     def _create_table(self):
         """
-        Create the 'authors' table if it does not exist
+        Create the tables if they do not exist
         """
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS authors (
@@ -24,13 +26,177 @@ class DatabaseManager:
                 url TEXT UNIQUE
             )
         ''')
+        # source: "manual" or "follow" (NULL for authors added by older versions);
+        # active = 0 for followed authors that have since been unfollowed
+        self._add_column_if_missing("authors", "source", "TEXT")
+        self._add_column_if_missing("authors", "active", "INTEGER DEFAULT 1")
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                path TEXT PRIMARY KEY,
+                mtime REAL,
+                size INTEGER,
+                phash TEXT
+            )
+        ''')
+        # 16x16 dHash (hex) and width / height, used to confirm coarse hash matches
+        self._add_column_if_missing("image_hashes", "fine_hash", "TEXT")
+        self._add_column_if_missing("image_hashes", "aspect", "REAL")
+        # Removed images (near-duplicates, transcoded JPEGs) => the image that was kept in their place
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_aliases (
+                path TEXT PRIMARY KEY,
+                representative TEXT
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tweets (
+                tweet_id TEXT PRIMARY KEY,
+                author_handle TEXT COLLATE NOCASE,
+                author_name TEXT,
+                content TEXT,
+                created_at TEXT,
+                matched INTEGER DEFAULT 0,
+                crawled_at TEXT
+            )
+        ''')
+        self._add_column_if_missing("tweets", "profiles", "TEXT")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tweets_author ON tweets (author_handle)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tweets_created ON tweets (created_at)")
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS media (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tweet_id TEXT REFERENCES tweets (tweet_id) ON DELETE CASCADE,
+                url TEXT,
+                local_path TEXT,
+                UNIQUE (tweet_id, url)
+            )
+        ''')
+        self._add_column_if_missing("media", "variant", "TEXT")
+        self._add_column_if_missing("media", "skipped", "INTEGER DEFAULT 0")
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS author_stats (
+                author_url TEXT PRIMARY KEY,
+                crawl_count INTEGER DEFAULT 0,
+                hit_count INTEGER DEFAULT 0,
+                empty_count INTEGER DEFAULT 0,
+                miss_streak INTEGER DEFAULT 0,
+                last_crawl_ts REAL,
+                last_match_ts REAL,
+                incomplete INTEGER DEFAULT 0
+            )
+        ''')
+        self._add_column_if_missing("author_stats", "empty_streak", "INTEGER DEFAULT 0")
+        # Crawl history per author and keyword profile: an author without FF menus may well post CWT ones,
+        # so misses only count against runs with the same keywords. author_stats above was kept
+        # per author only by older versions and is no longer read.
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS author_profile_stats (
+                author_url TEXT,
+                profile_key TEXT,
+                crawl_count INTEGER DEFAULT 0,
+                hit_count INTEGER DEFAULT 0,
+                empty_count INTEGER DEFAULT 0,
+                miss_streak INTEGER DEFAULT 0,
+                empty_streak INTEGER DEFAULT 0,
+                last_crawl_ts REAL,
+                last_match_ts REAL,
+                incomplete INTEGER DEFAULT 0,
+                PRIMARY KEY (author_url, profile_key)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_results (
+                image_hash TEXT PRIMARY KEY,
+                text TEXT,
+                booths TEXT
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_images (
+                path TEXT PRIMARY KEY,
+                image_hash TEXT
+            )
+        ''')
+        self._create_fts_index()
         self.conn.commit()
 
-    def get_all_author_urls(self):
+    def _add_column_if_missing(self, table: str, column: str, definition: str):
+        """
+        Add a column to a table created by an older version of this program
+        """
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in self.cursor.fetchall()]:
+            self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _create_fts_index(self):
+        """
+        Create the FTS5 indexes on tweet content and OCR text, kept in sync with triggers.
+        The trigram tokenizer is used so that CJK text and booth numbers can be matched by substring.
+        If this SQLite build has no FTS5 / trigram support, searches fall back to LIKE.
+        """
+        try:
+            self.cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5 (
+                    content, author_name, content='tweets', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            self.fts_enabled = False
+            return
+        self.fts_enabled = True
+        self.cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS tweets_ai AFTER INSERT ON tweets BEGIN
+                INSERT INTO tweets_fts (rowid, content, author_name)
+                VALUES (new.rowid, new.content, new.author_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tweets_ad AFTER DELETE ON tweets BEGIN
+                INSERT INTO tweets_fts (tweets_fts, rowid, content, author_name)
+                VALUES ('delete', old.rowid, old.content, old.author_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tweets_au AFTER UPDATE ON tweets BEGIN
+                INSERT INTO tweets_fts (tweets_fts, rowid, content, author_name)
+                VALUES ('delete', old.rowid, old.content, old.author_name);
+                INSERT INTO tweets_fts (rowid, content, author_name)
+                VALUES (new.rowid, new.content, new.author_name);
+            END;
+        ''')
+        self.cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS ocr_fts USING fts5 (
+                text, content='ocr_results', tokenize='trigram'
+            )
+        ''')
+        self.cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS ocr_results_ai AFTER INSERT ON ocr_results BEGIN
+                INSERT INTO ocr_fts (rowid, text) VALUES (new.rowid, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS ocr_results_ad AFTER DELETE ON ocr_results BEGIN
+                INSERT INTO ocr_fts (ocr_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+            END;
+        ''')
+
+    def get_all_author_urls(self, active_only=False):
+        """
+        Retrieve all author URLs from the database, or only the active ones
+        """
+        if active_only:
+            self.cursor.execute("SELECT url FROM authors WHERE active = 1")
+        else:
+            self.cursor.execute("SELECT url FROM authors")
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def get_inactive_author_urls(self):
         """
-        Retrieve all author URLs from the database
+        Retrieve the URLs of authors marked inactive (unfollowed)
         """
-        self.cursor.execute("SELECT url FROM authors")
+        self.cursor.execute("SELECT url FROM authors WHERE active = 0")
         return [row[0] for row in self.cursor.fetchall()]
     
     def search_author_url(self, url: str):
@@ -42,13 +208,51 @@ class DatabaseManager:
 
     def add_author_url(self, url: str):
         """
-        Add an author URL to the database
+        Add an author URL to the database, reactivating it if it already exists
         """
-        try:
-            self.cursor.execute("INSERT INTO authors (url) VALUES (?)", (url,))
-            self.conn.commit()
-        except sqlite3.IntegrityError:
-            pass  # URL already exists, ignore
+        self.cursor.execute('''
+            INSERT INTO authors (url, source) VALUES (?, 'manual')
+            ON CONFLICT (url) DO UPDATE SET active = 1
+        ''', (url,))
+        self.conn.commit()
+
+    def save_followed_authors(self, urls):
+        """
+        Add followed author URLs and reactivate the ones that were followed again.
+        Authors of unknown origin that appear in the following list are marked as followed.
+        """
+        self.cursor.executemany('''
+            INSERT INTO authors (url, source) VALUES (?, 'follow')
+            ON CONFLICT (url) DO UPDATE SET active = 1, source = COALESCE(authors.source, 'follow')
+        ''', [(url,) for url in urls])
+        self.conn.commit()
+
+    def count_unknown_source_authors(self) -> int:
+        """
+        Number of authors added by older versions, whose origin (manual / follow) is unknown
+        """
+        self.cursor.execute("SELECT COUNT(*) FROM authors WHERE source IS NULL")
+        return self.cursor.fetchone()[0]
+
+    def mark_unknown_source_as_followed(self):
+        """
+        One-time migration: treat authors of unknown origin as imported from the following list,
+        so that a full follow sync can deactivate the ones no longer followed
+        """
+        self.cursor.execute("UPDATE authors SET source = 'follow' WHERE source IS NULL")
+        self.conn.commit()
+
+    def deactivate_unfollowed_authors(self, followed_urls) -> list[str]:
+        """
+        Mark followed authors that are no longer in the following list as inactive.
+        Manually added authors are never deactivated. Returns the deactivated URLs.
+        """
+        followed = set(followed_urls)
+        self.cursor.execute("SELECT url FROM authors WHERE source = 'follow' AND active = 1")
+        unfollowed = [row[0] for row in self.cursor.fetchall() if row[0] not in followed]
+        self.cursor.executemany("UPDATE authors SET active = 0 WHERE url = ?", [(url,) for url in unfollowed])
+        self.conn.commit()
+        return unfollowed
 
     def remove_author_url(self, url: str):
         """
@@ -57,6 +261,312 @@ class DatabaseManager:
         self.cursor.execute("DELETE FROM authors WHERE url = ?", (url,))
         self.conn.commit()
 
+    def get_image_hash(self, path: str, mtime: float, size: int):
+        """
+        Get the stored (hash, fine hash, aspect) of an image, or None if the file changed since it was hashed
+        or was hashed by an older version without the fine hash
+        """
+        self.cursor.execute(
+            "SELECT phash, fine_hash, aspect FROM image_hashes WHERE path = ? AND mtime = ? AND size = ?",
+            (path, mtime, size)
+        )
+        row = self.cursor.fetchone()
+        if row is None or row[1] is None:
+            return None
+        return int(row[0], 16), int(row[1], 16), row[2]
+
+    def save_image_hash(self, path: str, mtime: float, size: int, phash: int, fine_hash: int, aspect: float):
+        """
+        Store the perceptual hashes of an image (hex text, since SQLite integers are signed 64-bit)
+        """
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO image_hashes (path, mtime, size, phash, fine_hash, aspect) VALUES (?, ?, ?, ?, ?, ?)",
+            (path, mtime, size, f"{phash:016x}", f"{fine_hash:064x}", aspect)
+        )
+        self.conn.commit()
+
+    def remove_image_hash(self, path: str):
+        """
+        Remove the stored perceptual hash of an image
+        """
+        self.cursor.execute("DELETE FROM image_hashes WHERE path = ?", (path,))
+        self.conn.commit()
+
+    def save_image_alias(self, path: str, representative: str):
+        """
+        Record that a removed image (a near-duplicate or a transcoded JPEG) was replaced by another file,
+        and point stored media (and older aliases) at that file
+        """
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO image_aliases (path, representative) VALUES (?, ?)", (path, representative)
+        )
+        self.cursor.execute("UPDATE image_aliases SET representative = ? WHERE representative = ?", (representative, path))
+        self.cursor.execute("UPDATE media SET local_path = ? WHERE local_path = ?", (representative, path))
+        self.conn.commit()
+
+    def resolve_image_alias(self, path: str):
+        """
+        Return the image that replaced a removed image, or None
+        """
+        self.cursor.execute("SELECT representative FROM image_aliases WHERE path = ?", (path,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def save_tweet(self, tweet_id: str, author_handle: str, author_name: str, content: str,
+                   created_at: str, matched: bool, media: list[dict], profiles=None):
+        """
+        Insert or update a crawled tweet and its media.
+        - media: [{"url": original URL, "local_path": ... or None, "variant": downloaded size variant,
+                   "skipped": whether the preview did not look like an oshinagaki}]
+        - profiles: Names of the keyword profiles (events) the tweet matched
+        """
+        self.cursor.execute('''
+            INSERT INTO tweets (tweet_id, author_handle, author_name, content, created_at, matched, profiles, crawled_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            ON CONFLICT (tweet_id) DO UPDATE SET
+                author_handle = excluded.author_handle,
+                author_name = excluded.author_name,
+                content = excluded.content,
+                created_at = excluded.created_at,
+                matched = excluded.matched,
+                profiles = excluded.profiles,
+                crawled_at = excluded.crawled_at
+        ''', (tweet_id, author_handle, author_name, content, created_at, int(matched),
+              json.dumps(profiles or [], ensure_ascii=False)))
+        for item in media:
+            self.cursor.execute('''
+                INSERT INTO media (tweet_id, url, local_path, variant, skipped) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (tweet_id, url) DO UPDATE SET
+                    local_path = COALESCE(excluded.local_path, media.local_path),
+                    variant = COALESCE(excluded.variant, media.variant),
+                    skipped = excluded.skipped AND COALESCE(excluded.local_path, media.local_path) IS NULL
+            ''', (tweet_id, item["url"], item.get("local_path"), item.get("variant"), int(item.get("skipped", False))))
+        self.conn.commit()
+
+    def search_tweets(self, keyword=None, author=None, since=None, until=None, matched_only=False, limit=100):
+        """
+        Search stored tweets, newest first.
+        - keyword: Substring of the tweet content or author name
+        - author: Author handle, @handle or profile URL
+        - since / until: Dates as YYYY-MM-DD (until is exclusive, like Twitter search)
+        Returns a list of dicts with the tweet fields and its media.
+        """
+        conditions = []
+        params = []
+        if keyword:
+            if self.fts_enabled and len(keyword) >= 3:
+                # The trigram tokenizer needs at least 3 characters, shorter keywords use LIKE
+                conditions.append("tweets.rowid IN (SELECT rowid FROM tweets_fts WHERE tweets_fts MATCH ?)")
+                params.append('"' + keyword.replace('"', '""') + '"')
+            else:
+                conditions.append("(tweets.content LIKE ? OR tweets.author_name LIKE ?)")
+                params.extend([f"%{keyword}%", f"%{keyword}%"])
+        if author:
+            conditions.append("tweets.author_handle = ?")
+            params.append(author.replace("https://x.com/", "").lstrip("@").strip("/"))
+        if since:
+            conditions.append("tweets.created_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("tweets.created_at < ?")
+            params.append(until)
+        if matched_only:
+            conditions.append("tweets.matched = 1")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        self.cursor.execute(f'''
+            SELECT tweet_id, author_handle, author_name, content, created_at, matched, profiles
+            FROM tweets {where}
+            ORDER BY created_at DESC
+            LIMIT ?
+        ''', (*params, limit))
+        rows = self.cursor.fetchall()
+
+        results = []
+        for tweet_id, author_handle, author_name, content, created_at, matched, profiles in rows:
+            self.cursor.execute(
+                "SELECT url, local_path, variant, skipped FROM media WHERE tweet_id = ? ORDER BY id", (tweet_id,)
+            )
+            media = [
+                {"url": url, "local_path": local_path, "variant": variant, "skipped": bool(skipped)}
+                for url, local_path, variant, skipped in self.cursor.fetchall()
+            ]
+            results.append({
+                "tweet_id": tweet_id,
+                "author_handle": author_handle,
+                "author_name": author_name,
+                "content": content,
+                "created_at": created_at,
+                "matched": bool(matched),
+                "profiles": json.loads(profiles) if profiles else [],
+                "media": media
+            })
+        return results
+
+    def get_media_by_path(self, local_path: str):
+        """
+        Get the stored media of a downloaded image, or None if the path is unknown.
+        Returns {"tweet_id", "url" (the original), "variant"}.
+        """
+        self.cursor.execute("SELECT tweet_id, url, variant FROM media WHERE local_path = ?", (local_path,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        return {"tweet_id": row[0], "url": row[1], "variant": row[2]}
+
+    def get_skipped_media(self, limit=None):
+        """
+        Get media skipped by the preview stage, newest tweets first.
+        Returns [{"tweet_id", "author_name", "url"}].
+        """
+        self.cursor.execute('''
+            SELECT media.tweet_id, tweets.author_name, media.url FROM media
+            JOIN tweets ON tweets.tweet_id = media.tweet_id
+            WHERE media.skipped = 1
+            ORDER BY tweets.created_at DESC
+            LIMIT ?
+        ''', (-1 if limit is None else limit,))
+        return [
+            {"tweet_id": tweet_id, "author_name": author_name, "url": url}
+            for tweet_id, author_name, url in self.cursor.fetchall()
+        ]
+
+    def save_fetched_media(self, tweet_id: str, url: str, local_path: str, variant: str):
+        """
+        Record that a skipped image has been downloaded after all
+        """
+        self.cursor.execute(
+            "UPDATE media SET local_path = ?, variant = ?, skipped = 0 WHERE tweet_id = ? AND url = ?",
+            (local_path, variant, tweet_id, url)
+        )
+        self.conn.commit()
+
+    def get_cached_search(self, cache_key: str, ttl: float):
+        """
+        Get a cached author search result, or None if it is missing or older than ttl seconds
+        """
+        now = time.time()
+        self.cursor.execute(
+            "SELECT result FROM search_cache WHERE cache_key = ? AND created_at >= ?",
+            (cache_key, now - ttl)
+        )
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        self.cursor.execute("UPDATE search_cache SET last_used = ? WHERE cache_key = ?", (now, cache_key))
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def save_cached_search(self, cache_key: str, result: dict, max_entries: int):
+        """
+        Cache an author search result, evicting the least recently used entries beyond max_entries
+        """
+        now = time.time()
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO search_cache (cache_key, result, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (cache_key, json.dumps(result, ensure_ascii=False), now, now)
+        )
+        self.cursor.execute('''
+            DELETE FROM search_cache WHERE cache_key NOT IN (
+                SELECT cache_key FROM search_cache ORDER BY last_used DESC LIMIT ?
+            )
+        ''', (max_entries,))
+        self.conn.commit()
+
+    def get_author_stats(self, profile_key: str):
+        """
+        Retrieve the crawl history of all authors under one keyword profile as {author_url: stats dict}
+        """
+        self.cursor.execute('''
+            SELECT author_url, crawl_count, hit_count, empty_count, miss_streak, empty_streak,
+                   last_crawl_ts, last_match_ts, incomplete
+            FROM author_profile_stats WHERE profile_key = ?
+        ''', (profile_key,))
+        columns = ["author_url", "crawl_count", "hit_count", "empty_count", "miss_streak", "empty_streak",
+                   "last_crawl_ts", "last_match_ts", "incomplete"]
+        return {row[0]: dict(zip(columns, row)) for row in self.cursor.fetchall()}
+
+    def update_author_stats(self, author_url: str, profile_key: str, hit: bool, empty: bool, now: float):
+        """
+        Add one complete crawl outcome to the author's history under a keyword profile and clear its incomplete flag.
+        A hit resets the miss streak, anything else extends it; an empty search page extends the empty streak.
+        """
+        self.cursor.execute('''
+            INSERT INTO author_profile_stats (author_url, profile_key, crawl_count, hit_count, empty_count,
+                                              miss_streak, empty_streak, last_crawl_ts, last_match_ts)
+            VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (author_url, profile_key) DO UPDATE SET
+                crawl_count = crawl_count + 1,
+                hit_count = hit_count + excluded.hit_count,
+                empty_count = empty_count + excluded.empty_count,
+                miss_streak = CASE WHEN excluded.hit_count THEN 0 ELSE miss_streak + 1 END,
+                empty_streak = CASE WHEN excluded.empty_count THEN COALESCE(empty_streak, 0) + 1 ELSE 0 END,
+                last_crawl_ts = excluded.last_crawl_ts,
+                last_match_ts = COALESCE(excluded.last_match_ts, last_match_ts),
+                incomplete = 0
+        ''', (author_url, profile_key, int(hit), int(empty), 0 if hit else 1, int(empty), now, now if hit else None))
+        self.conn.commit()
+
+    def mark_author_incomplete(self, author_url: str, profile_key: str):
+        """
+        Flag an author whose crawl under a keyword profile was cut short, without counting it as a crawl
+        """
+        self.cursor.execute('''
+            INSERT INTO author_profile_stats (author_url, profile_key, incomplete) VALUES (?, ?, 1)
+            ON CONFLICT (author_url, profile_key) DO UPDATE SET incomplete = 1
+        ''', (author_url, profile_key))
+        self.conn.commit()
+
+    def get_ocr_result(self, image_hash: str):
+        """
+        Get the cached OCR result of an image as (text, booths), or None if it has not been OCR'd
+        """
+        self.cursor.execute("SELECT text, booths FROM ocr_results WHERE image_hash = ?", (image_hash,))
+        row = self.cursor.fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def save_ocr_result(self, image_hash: str, text: str, booths: list[str]):
+        """
+        Store the OCR result of an image content hash (results never change for the same content)
+        """
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO ocr_results (image_hash, text, booths) VALUES (?, ?, ?)",
+            (image_hash, text, json.dumps(booths, ensure_ascii=False))
+        )
+        self.conn.commit()
+
+    def save_ocr_image(self, path: str, image_hash: str):
+        """
+        Link a local image path to its content hash
+        """
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO ocr_images (path, image_hash) VALUES (?, ?)", (path, image_hash)
+        )
+        self.conn.commit()
+
+    def search_ocr_text(self, keyword: str, limit=100):
+        """
+        Search the OCR text of downloaded images, returns [{"path", "text", "booths"}]
+        """
+        if self.fts_enabled and len(keyword) >= 3:
+            self.cursor.execute('''
+                SELECT ocr_images.path, ocr_results.text, ocr_results.booths
+                FROM ocr_results JOIN ocr_images ON ocr_images.image_hash = ocr_results.image_hash
+                WHERE ocr_results.rowid IN (SELECT rowid FROM ocr_fts WHERE ocr_fts MATCH ?)
+                LIMIT ?
+            ''', ('"' + keyword.replace('"', '""') + '"', limit))
+        else:
+            self.cursor.execute('''
+                SELECT ocr_images.path, ocr_results.text, ocr_results.booths
+                FROM ocr_results JOIN ocr_images ON ocr_images.image_hash = ocr_results.image_hash
+                WHERE ocr_results.text LIKE ? OR ocr_results.booths LIKE ?
+                LIMIT ?
+            ''', (f"%{keyword}%", f"%{keyword}%", limit))
+        return [
+            {"path": path, "text": text, "booths": json.loads(booths)}
+            for path, text, booths in self.cursor.fetchall()
+        ]
+
     def close(self):
         """
         Close the database connection
@@ -0,0 +1,258 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image
+from database import DatabaseManager
+from logger import LoggerManager
+
+# Side of the confirmation hash; 8x8 cannot tell apart menus built from the same template
+FINE_HASH_SIZE = 16
+
+
+def compute_dhash(path: str, hash_size: int = 8):
+    """
+    Compute the difference hash (dHash) of an image.
+    Runs in a worker process, so it must stay a module-level function.
+    Returns (path, hash as int), or (path, None) if the image cannot be read.
+    """
+    try:
+        with Image.open(path) as img:
+            return path, _dhash(img.convert("L"), hash_size)
+    except (OSError, ValueError):
+        return path, None
+
+
+def compute_fingerprint(path: str):
+    """
+    Compute the 8x8 dHash (for the BK-tree), the 16x16 dHash (to confirm matches) and the aspect ratio.
+    Runs in a worker process, so it must stay a module-level function.
+    Returns (path, (hash, fine hash, aspect)), or (path, None) if the image cannot be read.
+    """
+    try:
+        with Image.open(path) as img:
+            gray = img.convert("L")
+            return path, (_dhash(gray, 8), _dhash(gray, FINE_HASH_SIZE), img.width / img.height)
+    except (OSError, ValueError, ZeroDivisionError):
+        return path, None
+
+
+def _dhash(gray: Image.Image, hash_size: int) -> int:
+    pixels = gray.resize((hash_size + 1, hash_size), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """
+    BK-tree over 64-bit perceptual hashes, used to find all hashes within a Hamming distance
+    without comparing against every stored hash.
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value: int, item):
+        node = [value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming_distance(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value: int, threshold: int) -> list:
+        """
+        Return the items of all nodes whose hash is within threshold of value
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_value, item, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= threshold:
+                found.append(item)
+            for child_distance, child in children.items():
+                if distance - threshold <= child_distance <= distance + threshold:
+                    stack.append(child)
+        return found
+
+
+class ImageDeduplicator:
+    """
+    ImageDeduplicator groups near-duplicate oshinagaki images (reposts, re-encodes, light crops)
+    by perceptual hash, so the report only shows one representative per group.
+    args:
+        db: DatabaseManager used as the perceptual hash index.
+        max_workers: Number of worker processes used to hash images.
+        remove_duplicates: Whether to move the non-representative files out of the download directory
+            into trash_dir. References to a moved file (stored media, cached results) are resolved
+            to its representative through the alias index.
+        trash_dir: Where removed duplicates are moved to (default: duplicates_trash next to the first file).
+    methods:
+        compute_hashes: Hash images in a process pool, reusing the index for unchanged files.
+        group_duplicates: Group paths whose hashes are within HAMMING_THRESHOLD.
+        deduplicate_results: Replace each result's images with one representative per group.
+    """
+    # Maximum Hamming distance (out of 64 bits) for two images to be duplicate candidates
+    HAMMING_THRESHOLD = 6
+
+    # A candidate is only grouped if its 16x16 dHash is within this distance (out of 256 bits)
+    # and its aspect ratio within ASPECT_TOLERANCE. Reposts and re-encodes stay within a few bits,
+    # different menus made from the same template differ by several dozen.
+    FINE_HAMMING_THRESHOLD = 16
+    ASPECT_TOLERANCE = 0.05
+
+    logger = LoggerManager("dedup").get_logger()
+
+    def __init__(self, db: DatabaseManager, max_workers=None, remove_duplicates=False, trash_dir=None):
+        self.db = db
+        self.max_workers = max_workers
+        self.remove_duplicates = remove_duplicates
+        self.trash_dir = Path(trash_dir) if trash_dir else None
+        # Files removed by the last deduplicate_results() call {removed path: representative}
+        self.removed = {}
+
+    def compute_hashes(self, paths) -> dict:
+        """
+        Return {path: (hash, fine hash, aspect)} for every readable image. Files whose size and mtime
+        match the index are not hashed again.
+        """
+        hashes = {}
+        pending = []
+        for path in dict.fromkeys(str(p) for p in paths):
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            cached = self.db.get_image_hash(path, stat.st_mtime, stat.st_size)
+            if cached is not None:
+                hashes[path] = cached
+            else:
+                pending.append(path)
+
+        if pending:
+            self.logger.info(f"Computing perceptual hashes for {len(pending)} images...")
+            print(f"計算 {len(pending)} 張圖片的相似度指紋...")
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                for path, value in executor.map(compute_fingerprint, pending, chunksize=8):
+                    if value is None:
+                        self.logger.info(f"Unable to read image, skipping hash: {path}")
+                        continue
+                    stat = os.stat(path)
+                    self.db.save_image_hash(path, stat.st_mtime, stat.st_size, *value)
+                    hashes[path] = value
+        return hashes
+
+    def group_duplicates(self, paths) -> list[list[str]]:
+        """
+        Group near-duplicate images. Paths that cannot be hashed form their own group.
+        The first path of each group is the representative (the largest file,
+        which is usually the uncropped / highest quality version).
+        """
+        hashes = self.compute_hashes(paths)
+        tree = BKTree()
+        group_of = {}
+        groups = []
+        for path in dict.fromkeys(str(p) for p in paths):
+            value = hashes.get(path)
+            if value is None:
+                group_of[path] = len(groups)
+                groups.append([path])
+                continue
+            matches = [m for m in tree.search(value[0], self.HAMMING_THRESHOLD) if self._confirmed(value, hashes[m])]
+            if matches:
+                group_idx = min(group_of[m] for m in matches)
+                groups[group_idx].append(path)
+            else:
+                group_idx = len(groups)
+                groups.append([path])
+            group_of[path] = group_idx
+            tree.add(value[0], path)
+
+        for group in groups:
+            group.sort(key=lambda p: os.path.getsize(p) if os.path.exists(p) else -1, reverse=True)
+        return groups
+
+    def _confirmed(self, a, b) -> bool:
+        """
+        Whether a coarse hash match is really the same image: close 16x16 dHash and same aspect ratio
+        """
+        if hamming_distance(a[1], b[1]) > self.FINE_HAMMING_THRESHOLD:
+            return False
+        return abs(a[2] - b[2]) <= self.ASPECT_TOLERANCE * max(a[2], b[2])
+
+    def deduplicate_results(self, results: list[dict]) -> list[dict]:
+        """
+        Return a copy of the crawl results where each duplicate group is shown once,
+        at its first occurrence, using the group's representative image.
+        The representative is tagged with the keyword profiles of every image in its group.
+        """
+        all_paths = [str(p) for item in results for p in item["images"]]
+        groups = self.group_duplicates(all_paths)
+        representative = {}
+        for group in groups:
+            for path in group:
+                representative[path] = group[0]
+
+        rep_profiles = {}
+        for item in results:
+            for path, profiles in item.get("profiles", {}).items():
+                merged = rep_profiles.setdefault(representative.get(path, path), [])
+                merged.extend(p for p in profiles if p not in merged)
+
+        shown = set()
+        deduped = []
+        for item in results:
+            images = []
+            for path in item["images"]:
+                rep = representative.get(str(path), str(path))
+                if rep in shown:
+                    continue
+                shown.add(rep)
+                images.append(Path(rep))
+            deduped.append({
+                **item,
+                "images": images,
+                "profiles": {str(p): rep_profiles.get(str(p), []) for p in images}
+            })
+
+        duplicate_count = len(all_paths) - len(shown)
+        self.logger.info(f"{len(shown)} unique images, {duplicate_count} duplicates hidden")
+        print(f"共 {len(shown)} 張不重複圖片，略過 {duplicate_count} 張重複圖片")
+
+        if self.remove_duplicates:
+            self._remove_duplicate_files(groups)
+        return deduped
+
+    def _remove_duplicate_files(self, groups: list[list[str]]):
+        """
+        Move every non-representative file of each group to the trash directory and record its representative.
+        Nothing is deleted, so a wrongly grouped image can be restored by moving it back.
+        """
+        self.removed = {}
+        for group in groups:
+            for path in group[1:]:
+                if not os.path.exists(path):
+                    continue
+                trash_dir = self.trash_dir or Path(path).parent / "duplicates_trash"
+                trash_dir.mkdir(parents=True, exist_ok=True)
+                os.replace(path, trash_dir / Path(path).name)
+                self.db.remove_image_hash(path)
+                self.db.save_image_alias(path, group[0])
+                self.removed[path] = group[0]
+                self.logger.info(f"Moved duplicate image to {trash_dir}: {path} (kept {group[0]})")
@@ -1,32 +1,68 @@
+import re
 import time
 from pathlib import Path
 from playwright.sync_api import sync_playwright, ElementHandle, Page
 from database import DatabaseManager
 from logger import LoggerManager
+from browser_profile import launch_browser, context_options
 class FollowScraper:
     """
     FollowScraper is responsible for extracting author URLs from followed users and saving them to the database.
+    The following list is ordered newest first, so a routine sync stops once it reaches a run of
+    authors already in the database; a full sync scans the whole list and marks unfollowed authors inactive,
+    but only if the scan reached the following count shown on the profile.
     args:
         user_number: Represents the user number, default is 1.
+        headless: Whether to run the browser in headless mode, using the lean crawl profile.
+        full_sync: Whether to scan the whole following list and deactivate authors that were unfollowed.
+        adopt_unknown_authors: Whether a full sync first treats authors of unknown origin (added by older
+            versions) as followed, so that stale ones can be deactivated too.
 
     methods:
         extract_followed_users: Extracts author URLs from followed users.
         insert_followed_users_to_db: Saves the extracted author URLs to the database.
         run: Executes the process of extracting author URLs.
     """
+    # A routine sync stops after this many consecutive already-known authors
+    KNOWN_STOP_RUN = 20
+
+    # Scrolls without any new user before the end of the list is assumed
+    MAX_IDLE_SCROLLS = 10
+
+    # Followed accounts that may be missing from the list (suspended / deactivated accounts are not shown)
+    # while the scan still counts as complete
+    FOLLOWING_COUNT_TOLERANCE = 2
+
     logger = LoggerManager("follow").get_logger()
-    def __init__(self, user_number=None):
+    def __init__(self, user_number=None, headless=False, full_sync=False, adopt_unknown_authors=False):
         if user_number is None:
             user_number = 1
         index = user_number - 1
         self.storage_path = Path(f"./auth/twitter_storage_{index}.json")
         self.followed_users = []
+        self.headless = headless
+        self.full_sync = full_sync
+        self.adopt_unknown_authors = adopt_unknown_authors
+        # Following count shown on the profile (None if unreadable), and whether the scan ended normally
+        self.following_count = None
+        self.scan_interrupted = False
 
-    def extract_followed_users(self, page:Page):
-        max_attempts = 10
+    def extract_followed_users(self, page:Page, known_users=None):
+        """
+        Scroll the following list and collect author URLs.
+        If known_users is given, stop after KNOWN_STOP_RUN consecutive users that are in it.
+        """
+        max_attempts = self.MAX_IDLE_SCROLLS
         same_count_times = 0
+        known_streak = 0
         while True:
-            page.wait_for_selector('button[data-testid="UserCell"]', timeout=10000)
+            try:
+                page.wait_for_selector('button[data-testid="UserCell"]', timeout=10000)
+            except Exception as e:
+                # Keep what was collected, but it cannot be used to find unfollowed authors
+                self.logger.info(f"Following list stopped loading: {e}")
+                self.scan_interrupted = True
+                break
             user_cells = page.query_selector_all('button[data-testid="UserCell"]')
             new_count = 0
             for user_cell in user_cells:
@@ -38,6 +74,10 @@ class FollowScraper:
                         if full_url not in self.followed_users:
                             self.followed_users.append(full_url)
                             new_count += 1
+                            known_streak = known_streak + 1 if known_users and full_url in known_users else 0
+            if known_users and known_streak >= self.KNOWN_STOP_RUN:
+                self.logger.info(f"Reached {known_streak} already known users, stopping the sync.")
+                break
             if new_count == 0:
                 same_count_times += 1
             else:
@@ -49,18 +89,51 @@ class FollowScraper:
 
     def insert_followed_users_to_db(self, users):
         db = DatabaseManager()
-        for user in users:
-            db.add_author_url(user)
+        known = set(db.get_all_author_urls())
+        db.save_followed_authors(users)
+        added = len([user for user in users if user not in known])
+        self.logger.info(f"{added} new followed users saved.")
+        print(f"新增 {added} 位作者")
+        if self.full_sync:
+            # Only a complete scan of the following list can tell which authors were unfollowed
+            if self.scan_complete(users):
+                if self.adopt_unknown_authors:
+                    db.mark_unknown_source_as_followed()
+                unfollowed = db.deactivate_unfollowed_authors(users)
+                self.logger.info(f"{len(unfollowed)} unfollowed users marked inactive.")
+                print(f"{len(unfollowed)} 位已取消追蹤的作者設為停用，之後的查詢將略過")
+            else:
+                self.logger.info(f"Incomplete scan ({len(users)} of {self.following_count} followed users), "
+                                 "no authors deactivated.")
+                print(f"追蹤清單未完整讀取 ({len(users)}/{self.following_count or '?'})，本次不停用任何作者，請稍後再試")
         db.close()
 
+    def scan_complete(self, users) -> bool:
+        """
+        Whether the scan saw the whole following list: it ended normally and reached the profile's following count
+        """
+        if self.scan_interrupted or self.following_count is None:
+            return False
+        return len(users) >= self.following_count - self.FOLLOWING_COUNT_TOLERANCE
+
+    def read_following_count(self, page: Page, user_name: str):
+        """
+        Read the exact following count from the profile page, or None if it is missing or abbreviated (e.g. 1.2K)
+        """
+        link = page.query_selector(f'a[href="/{user_name}/following"]')
+        if not link:
+            return None
+        match = re.search(r"^\s*([\d,]+)(?![\d.,]*\s*[KkMm萬万])", link.inner_text())
+        return int(match.group(1).replace(",", "")) if match else None
+
     def run(self):
         if not self.storage_path.exists():
             self.logger.info("No login state found.")
             print("無驗證狀態檔案，請先執行驗證。")
             return
         with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False)
-            context = browser.new_context(storage_state=str(self.storage_path))
+            browser = launch_browser(p.chromium, headless=self.headless, lean=self.headless)
+            context = browser.new_context(storage_state=str(self.storage_path), **context_options(self.headless))
             page = context.new_page()
             page.goto("https://x.com/home")
             time.sleep(3)
@@ -72,9 +145,19 @@ class FollowScraper:
             if not user_name:
                 self.logger.info("Can't get username.")
                 return
+            if self.full_sync:
+                page.goto(f"https://x.com/{user_name}")
+                time.sleep(3)
+                self.following_count = self.read_following_count(page, user_name)
+                self.logger.info(f"Following count on profile: {self.following_count}")
             page.goto(f"https://x.com/{user_name}/following")
             time.sleep(3)
-            results = self.extract_followed_users(page)
+            known_users = None
+            if not self.full_sync:
+                db = DatabaseManager()
+                known_users = set(db.get_all_author_urls())
+                db.close()
+            results = self.extract_followed_users(page, known_users)
             self.insert_followed_users_to_db(results)
             context.close()
             browser.close()
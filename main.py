@@ -2,6 +2,56 @@ from database import DatabaseManager
 from follow import FollowScraper
 from authenticate import TwitterAuthenticator
 from OshinagakiFinder import TwitterCrawler
+
+def ask_run_deadline():
+    """
+    Ask for the time limit of a crawl run in minutes, returns seconds or None for no limit
+    """
+    while True:
+        minutes = input("請輸入本次查詢時間上限(分鐘，不限制請直接 Enter):")
+        if not minutes:
+            return None
+        if minutes.isdigit() and int(minutes) > 0:
+            return int(minutes) * 60
+        print("無效的輸入，請輸入正整數。")
+
+def ask_headless():
+    """
+    Ask whether to run the browser headless (lean profile, no window needed)
+    """
+    while True:
+        answer = input("是否在背景執行瀏覽器(不顯示視窗，較省資源)? (y/N):").strip().lower()
+        if answer in ["", "n", "no"]:
+            return False
+        if answer in ["y", "yes"]:
+            return True
+        print("無效的輸入，請輸入 y 或 n。")
+
+def ask_prioritize_authors():
+    """
+    Ask whether to order authors by their history and skip the ones without recent menus
+    """
+    while True:
+        answer = input("是否優先查詢常有品書的作者，並暫時略過近期皆無品書的作者? (Y/n):").strip().lower()
+        if answer in ["", "y", "yes"]:
+            return True
+        if answer in ["n", "no"]:
+            return False
+        print("無效的輸入，請輸入 y 或 n。")
+
+def ask_media_variant():
+    """
+    Ask for the size variant of downloaded images, returns one of MEDIA_VARIANTS
+    """
+    variants = ["orig", "4096x4096", "large", "medium"]
+    while True:
+        answer = input("請選擇圖片尺寸 1.orig(原圖) 2.4096x4096 3.large 4.medium (預設原圖請直接 Enter):").strip()
+        if not answer:
+            return "orig"
+        if answer in ["1", "2", "3", "4"]:
+            return variants[int(answer) - 1]
+        print("無效的輸入，請輸入 1~4。")
+
 def main():
     """
     Main functionality options of this program:
@@ -17,20 +67,24 @@ def main():
     Users can query all authors' works and choose to query FF sessions or other keywords 
     (such as CWT, this is a Beta option).
 
-    4. Exit
+    4. Search Past Results:
+    Users can search tweets stored by previous crawls by keyword, author or date, without crawling again.
+
+    5. Exit
     
     """
     while True:
         print("\n1.登入驗證")
         print("2.作者資料庫")
         print("3.查詢所有作者品書")
-        print("4.離開")
+        print("4.搜尋歷史結果")
+        print("5.離開")
         while True:
             choice = input("請輸入選項:")
-            if choice in ["1", "2", "3", "4"]:
+            if choice in ["1", "2", "3", "4", "5"]:
                 break
             else:
-                print("無效的選項，請輸入1到4之間的數字。")
+                print("無效的選項，請輸入1到5之間的數字。")
         
         if choice == "1":
             auth = TwitterAuthenticator()
@@ -51,8 +105,24 @@ def main():
                     print("無效的選項，請輸入1到5之間的數字。")
             database = DatabaseManager()
             if choice == "1":
+                unknown_count = database.count_unknown_source_authors()
                 database.close()
-                follow = FollowScraper()
+                while True:
+                    answer = input("是否完整比對追蹤清單(較慢，會將已取消追蹤的作者設為停用)? (y/N):").strip().lower()
+                    if answer in ["", "n", "no", "y", "yes"]:
+                        break
+                    print("無效的輸入，請輸入 y 或 n。")
+                full_sync = answer in ["y", "yes"]
+                adopt = False
+                if full_sync and unknown_count:
+                    while True:
+                        answer = input(f"資料庫中有 {unknown_count} 位舊版本加入、來源不明的作者，"
+                                       "是否視為追蹤清單匯入(不在追蹤清單中的將被停用)? (y/N):").strip().lower()
+                        if answer in ["", "n", "no", "y", "yes"]:
+                            break
+                        print("無效的輸入，請輸入 y 或 n。")
+                    adopt = answer in ["y", "yes"]
+                follow = FollowScraper(headless=ask_headless(), full_sync=full_sync, adopt_unknown_authors=adopt)
                 follow.run()
             elif choice == "2":
                 while True:
@@ -63,9 +133,10 @@ def main():
                         break
             elif choice == "3":
                 urls = database.get_all_author_urls()
+                inactive = set(database.get_inactive_author_urls())
                 print("所有作者網址:")
                 for url in urls:
-                    print(url)
+                    print(f"{url} (已取消追蹤，查詢時略過)" if url in inactive else url)
             elif choice == "4":
                 url = input("請輸入作者網址:")
                 result=database.search_author_url(url)
@@ -81,13 +152,14 @@ def main():
             print("\n請問查詢場次")
             print("1.查詢FF場次")
             print("2.查詢其他(將由使用者自行輸入關鍵字)")
-            print("3.離開")
+            print("3.同時查詢多個場次")
+            print("4.離開")
             while True:
                 choice = input("請輸入選項:")
-                if choice in ["1", "2", "3"]:
+                if choice in ["1", "2", "3", "4"]:
                     break
                 else:
-                    print("無效的選項，請輸入1到3之間的數字。")
+                    print("無效的選項，請輸入1到4之間的數字。")
             if choice == "1":
                 while True:
                     session_choice = input("請問要查詢哪一場次?(預設為FF44)\n請輸入場次(預設為FF44，使用預設直接 Enter 即可):") or "44"
@@ -98,8 +170,11 @@ def main():
                 crawler = TwitterCrawler(
                     output_html="output.html",
                     download_dir="downloaded_images",
-                    headless=False,
-                    sessions_number=session_choice
+                    headless=ask_headless(),
+                    sessions_number=session_choice,
+                    run_deadline_seconds=ask_run_deadline(),
+                    prioritize_authors=ask_prioritize_authors(),
+                    media_variant=ask_media_variant()
                 )
                 crawler.run()
             elif choice == "2":
@@ -113,13 +188,69 @@ def main():
                 crawler = TwitterCrawler(
                     output_html="output.html",
                     download_dir="downloaded_images",
-                    headless=False,
+                    headless=ask_headless(),
                     sessions_number=None,
-                    custom_keywords=keywords
+                    custom_keywords=keywords,
+                    run_deadline_seconds=ask_run_deadline(),
+                    prioritize_authors=ask_prioritize_authors(),
+                    media_variant=ask_media_variant()
+                )
+                crawler.run()
+            elif choice == "3":
+                profiles = {}
+                while True:
+                    name = input("請輸入場次名稱，例如 FF45、CWT(輸入完成後請按兩次 Enter 即可):").strip()
+                    if not name:
+                        break
+                    keywords = []
+                    while True:
+                        keyword = input(f"請輸入 {name} 的關鍵字(FF場次可直接 Enter 使用預設關鍵字，輸入完成後請按兩次 Enter 即可):")
+                        if keyword:
+                            keywords.append(keyword)
+                        else:
+                            break
+                    profiles[name] = keywords
+                if not profiles:
+                    print("沒有輸入任何場次")
+                    continue
+                crawler = TwitterCrawler(
+                    output_html="output.html",
+                    download_dir="downloaded_images",
+                    headless=ask_headless(),
+                    keyword_profiles=profiles,
+                    run_deadline_seconds=ask_run_deadline(),
+                    prioritize_authors=ask_prioritize_authors(),
+                    media_variant=ask_media_variant()
                 )
                 crawler.run()
             
         elif choice == "4":
+            keyword = input("請輸入關鍵字(不限制請直接 Enter):").strip()
+            author = input("請輸入作者帳號或網址(不限制請直接 Enter):").strip()
+            since = input("請輸入起始日期 YYYY-MM-DD(不限制請直接 Enter):").strip()
+            until = input("請輸入結束日期 YYYY-MM-DD(不限制請直接 Enter):").strip()
+            database = DatabaseManager()
+            tweets = database.search_tweets(keyword=keyword, author=author, since=since, until=until)
+            images = database.search_ocr_text(keyword) if keyword else []
+            database.close()
+            if not tweets:
+                print("沒有找到符合條件的推文")
+            for tweet in tweets:
+                print(f"\n[{tweet['created_at']}] @{tweet['author_handle']} https://x.com/{tweet['author_handle']}/status/{tweet['tweet_id']}")
+                print(tweet["content"])
+                for item in tweet["media"]:
+                    print(f"  圖片: {item['local_path'] or item['url']}")
+                    if item["skipped"]:
+                        print("    (預覽不像品書，未下載)")
+                    if item["local_path"] and item["variant"] not in [None, "orig"]:
+                        print(f"    原圖: {item['url']}")
+            if images:
+                print("\n品書圖片文字符合:")
+            for image in images:
+                booths = f" (攤位: {', '.join(image['booths'])})" if image["booths"] else ""
+                print(f"  {image['path']}{booths}")
+
+        elif choice == "5":
             break
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+import io
+import os
+import re
+from pathlib import Path
+import requests
+from PIL import Image, ImageFilter
+from database import DatabaseManager
+
+# Size variants served by pbs.twimg.com, from largest to smallest
+MEDIA_VARIANTS = ["orig", "4096x4096", "large", "medium", "small"]
+
+# Formats downloaded images can be transcoded to, with their file extension
+TRANSCODE_FORMATS = {"webp": ".webp", "avif": ".avif"}
+
+# Preview heuristics. An oshinagaki is mostly text and item pictures on a flat background:
+# many sharp edges (text) and a large share of pixels in one brightness band (background).
+# Photos have few flat areas, sketches have few edges. Thresholds favour recall, skipped media
+# are recorded and can still be fetched later.
+PREVIEW_VARIANT = "small"
+PREVIEW_SIZE = 256
+EDGE_THRESHOLD = 48
+MIN_EDGE_DENSITY = 0.04
+MIN_BACKGROUND_SHARE = 0.2
+# Width / height outside this range (banners, long strips) is not a printable oshinagaki
+ASPECT_RANGE = (0.4, 2.5)
+
+
+def media_url(img_url: str, variant: str = "orig") -> str:
+    """
+    Return the URL of a size variant of a Twitter image
+    """
+    return re.sub(r"\?.*", "", img_url) + f"?format=jpg&name={variant}"
+
+
+def largest_variant(variants) -> str:
+    """
+    Return the largest of the given variants (orig if none are given)
+    """
+    variants = [v for v in variants if v in MEDIA_VARIANTS]
+    return min(variants, key=MEDIA_VARIANTS.index) if variants else "orig"
+
+
+def transcode_image(src: str, dst: str, fmt: str = "webp", quality: int = 80):
+    """
+    Re-encode a downloaded image into a compact format and remove the original file.
+    Runs in a worker process, so it must stay a module-level function.
+    Returns (src, dst, saved bytes), or (src, None, 0) if the image is kept as it is.
+    """
+    try:
+        original_size = os.path.getsize(src)
+        with Image.open(src) as img:
+            img.convert("RGB").save(dst, format=fmt.upper(), quality=quality)
+    except (OSError, ValueError, KeyError):
+        # Unreadable download or no encoder for this format in this Pillow build
+        if os.path.exists(dst):
+            os.remove(dst)
+        return src, None, 0
+    os.remove(src)
+    return src, dst, original_size - os.path.getsize(dst)
+
+
+def classify_preview(key, data: bytes):
+    """
+    Decide from a small preview whether an image is likely an oshinagaki.
+    Runs in a worker process, so it must stay a module-level function.
+    Returns (key, likely, details); unreadable previews count as likely so the full image is still fetched.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            aspect = img.width / img.height
+            gray = img.convert("L")
+            gray.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+    except (OSError, ValueError, ZeroDivisionError):
+        return key, True, {}
+
+    pixels = gray.width * gray.height
+    edges = gray.filter(ImageFilter.FIND_EDGES).histogram()
+    edge_density = sum(edges[EDGE_THRESHOLD:]) / pixels
+    # 16 brightness bands, the fullest one is taken as the background
+    histogram = gray.histogram()
+    background_share = max(sum(histogram[i:i + 16]) for i in range(0, 256, 16)) / pixels
+
+    details = {
+        "aspect": round(aspect, 2),
+        "edge_density": round(edge_density, 3),
+        "background_share": round(background_share, 3)
+    }
+    likely = (
+        ASPECT_RANGE[0] <= aspect <= ASPECT_RANGE[1]
+        and edge_density >= MIN_EDGE_DENSITY
+        and background_share >= MIN_BACKGROUND_SHARE
+    )
+    return key, likely, details
+
+
+def fetch_original(db: DatabaseManager, local_path: str, user_agent=None):
+    """
+    Download the full size original of an image that was stored as a smaller variant.
+    Saves it next to the local file as <name>_orig.jpg and returns that path, or None if unknown.
+    """
+    media = db.get_media_by_path(str(local_path))
+    if media is None:
+        return None
+    target = Path(local_path).with_name(f"{Path(local_path).stem}_orig.jpg")
+    r = requests.get(media["url"], timeout=30, headers={"User-Agent": user_agent} if user_agent else None)
+    r.raise_for_status()
+    with open(target, "wb") as f:
+        f.write(r.content)
+    return target
+
+
+def fetch_skipped_media(db: DatabaseManager, download_dir="downloaded_images", variant="orig", limit=None):
+    """
+    Download the images skipped by the preview stage and record them in the database.
+    Returns the downloaded paths.
+    """
+    downloaded = []
+    for item in db.get_skipped_media(limit):
+        safe_author = re.sub(r"[^a-zA-Z0-9_\-]+", "_", item["author_name"]) if item["author_name"] else "unknown"
+        media_id = re.sub(r"\?.*", "", item["url"]).rsplit("/", 1)[-1]
+        local_path = Path(download_dir) / f"{safe_author}_{item['tweet_id']}_{media_id}.jpg"
+        try:
+            r = requests.get(media_url(item["url"], variant), timeout=30)
+            r.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"無法下載 {item['url']}，錯誤: {e}")
+            continue
+        with open(local_path, "wb") as f:
+            f.write(r.content)
+        db.save_fetched_media(item["tweet_id"], item["url"], str(local_path), variant)
+        downloaded.append(local_path)
+    return downloaded
+
+
+if __name__ == "__main__":
+    # Download every image the preview stage skipped
+    database = DatabaseManager()
+    paths = fetch_skipped_media(database)
+    database.close()
+    print(f"已下載 {len(paths)} 張先前略過的圖片")
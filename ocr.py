@@ -0,0 +1,154 @@
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from PIL import Image
+from database import DatabaseManager
+from logger import LoggerManager
+
+try:
+    import pytesseract
+except ImportError:
+    # OCR is optional, the crawl works without it
+    pytesseract = None
+
+# Tesseract languages: Japanese, Traditional Chinese and English (booth numbers, prices)
+OCR_LANGUAGES = "jpn+chi_tra+eng"
+
+# Tesseract is itself multi-threaded (OpenMP), so a worker per CPU would oversubscribe the machine.
+# A few single-threaded workers keep the browser and the rest of the system responsive.
+MAX_OCR_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+# Booth numbers after a label, e.g. "攤位：A12", "攤號 B-34a", "スペース 東K01"
+LABELED_BOOTH_PATTERN = re.compile(
+    r"(?:攤位|攤號|摊位|摊号|ブース|スペース|Booth|Space)\s*[:：]?\s*([東西南北]?)([A-Z]{1,2})\s?-?\s?(\d{1,3})([ab]?)",
+    re.IGNORECASE
+)
+
+# Bare booth numbers, e.g. "A12", "B-34b". One letter and two digits only, so that
+# event names such as FF44 or C105 are not mistaken for booths.
+BARE_BOOTH_PATTERN = re.compile(r"(?<![A-Za-z0-9])([A-Z])\s?-?\s?(\d{2})([ab]?)(?![A-Za-z0-9])")
+
+
+def limit_tesseract_threads():
+    """
+    Worker initializer: run each Tesseract process single-threaded, unless the user set a limit
+    """
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def ocr_image(path: str, languages: str = OCR_LANGUAGES):
+    """
+    OCR one image. Runs in a worker process, so it must stay a module-level function.
+    Returns (path, text), or (path, None) if the image cannot be read.
+    """
+    try:
+        with Image.open(path) as img:
+            text = pytesseract.image_to_string(img.convert("L"), lang=languages)
+    except (OSError, ValueError, pytesseract.TesseractError):
+        return path, None
+    return path, text
+
+
+def extract_booths(text: str) -> list[str]:
+    """
+    Extract booth numbers from OCR text, normalized to e.g. "A12" / "B34a"
+    """
+    # NFKC turns full-width letters and digits (Ａ１２) into ASCII
+    text = unicodedata.normalize("NFKC", text)
+    booths = [
+        f"{area}{letters.upper()}{digits}{suffix.lower()}"
+        for area, letters, digits, suffix in LABELED_BOOTH_PATTERN.findall(text)
+    ]
+    if not booths:
+        booths = [f"{letter}{digits}{suffix}" for letter, digits, suffix in BARE_BOOTH_PATTERN.findall(text)]
+    return list(dict.fromkeys(booths))
+
+
+class OshinagakiOCR:
+    """
+    OshinagakiOCR extracts the text of downloaded oshinagaki images with a local, CPU-only Tesseract,
+    stores it in a searchable index and picks out booth numbers.
+    Results are cached by image content hash, so each run only OCRs new images.
+    args:
+        db: DatabaseManager used as the OCR cache and search index.
+        max_workers: Number of worker processes running Tesseract (default: MAX_OCR_WORKERS).
+    methods:
+        available: Whether pytesseract and the tesseract binary are installed.
+        index_images: OCR new images and return the booth numbers of every image.
+    """
+    logger = LoggerManager("ocr").get_logger()
+
+    def __init__(self, db: DatabaseManager, max_workers=None):
+        self.db = db
+        self.max_workers = max_workers or MAX_OCR_WORKERS
+
+    def available(self) -> bool:
+        if pytesseract is None:
+            return False
+        try:
+            pytesseract.get_tesseract_version()
+        except pytesseract.TesseractNotFoundError:
+            return False
+        return True
+
+    @staticmethod
+    def _past(deadline) -> bool:
+        return deadline is not None and time.time() >= deadline
+
+    def index_images(self, paths, deadline=None) -> dict:
+        """
+        Return {path: [booth numbers]} for the given images, OCR'ing only images whose content hash
+        has no cached result. Images not OCR'd by the deadline (a time.time() value) are left
+        for the next run; images finished before it are kept.
+        """
+        if not self.available():
+            self.logger.info("pytesseract / tesseract not installed, skipping OCR")
+            print("未安裝 tesseract，略過品書文字辨識")
+            return {}
+
+        hashes = {}
+        for path in dict.fromkeys(str(p) for p in paths):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                hashes[path] = hashlib.sha256(f.read()).hexdigest()
+            self.db.save_ocr_image(path, hashes[path])
+
+        # One path per content hash that has never been OCR'd
+        pending = {}
+        for path, image_hash in hashes.items():
+            if image_hash not in pending.values() and self.db.get_ocr_result(image_hash) is None:
+                pending[path] = image_hash
+
+        if pending:
+            self.logger.info(f"Running OCR on {len(pending)} new images...")
+            print(f"辨識 {len(pending)} 張新圖片的文字...")
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=limit_tesseract_threads) as executor:
+                # Only max_workers images are in flight, so nothing new starts once the deadline has passed
+                queued = list(pending)
+                running = set()
+                while queued or running:
+                    while queued and len(running) < self.max_workers and not self._past(deadline):
+                        running.add(executor.submit(ocr_image, queued.pop(0)))
+                    if not running:
+                        break
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, text = future.result()
+                        if text is None:
+                            self.logger.info(f"OCR failed: {path}")
+                            continue
+                        self.db.save_ocr_result(pending[path], text, extract_booths(text))
+            if queued:
+                self.logger.info(f"Run deadline reached, leaving {len(queued)} images for the next OCR run")
+                print(f"已達本次查詢時間上限，剩餘 {len(queued)} 張圖片將於下次辨識")
+
+        booths = {}
+        for path, image_hash in hashes.items():
+            cached = self.db.get_ocr_result(image_hash)
+            if cached is not None:
+                booths[path] = cached[1]
+        return booths
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+from playwright.async_api import async_playwright
+from logger import LoggerManager
+from browser_profile import LEAN_LAUNCH_ARGS, LEAN_VIEWPORT
+
+
+class LoginStatePreflight:
+    """
+    LoginStatePreflight checks the stored login states before a crawl,
+    so that retries and waits only go to accounts that can actually serve requests.
+    args:
+        headless: Whether the probe browser runs in headless mode (pass the crawler's setting).
+        user_agent_factory: Optional callable returning the user agent of each probe context,
+            the same one the crawler uses, so probes do not announce HeadlessChrome.
+        probe_timeout: Milliseconds a probe page may take to show the logged-in home timeline.
+    methods:
+        check_offline: Check the auth cookies of a storage state file without opening a browser.
+        probe_all: Load the home page of every account concurrently.
+        run: Check all storage states and return them ordered by health, dead ones excluded.
+    """
+    # Cookies that must be present (and not expired) for a logged-in session
+    REQUIRED_COOKIES = ["auth_token", "ct0"]
+
+    # Maximum number of accounts probed at the same time
+    MAX_CONCURRENT_PROBES = 4
+
+    PROBE_URL = "https://x.com/home"
+
+    # Statuses, from best to worst; "ok" and "slow" accounts are kept, "slow" ones are moved to the end
+    STATUS_ORDER = ["ok", "slow", "expired", "logged_out", "locked", "error"]
+
+    logger = LoggerManager("preflight").get_logger()
+
+    def __init__(self, headless=True, probe_timeout=15000, user_agent_factory=None):
+        self.headless = headless
+        self.user_agent_factory = user_agent_factory
+        self.probe_timeout = probe_timeout
+
+    def check_offline(self, storage_state: str):
+        """
+        Return (status, detail) from the cookies of a storage state file.
+        status is "ok" if the auth cookies exist and have not expired, otherwise "expired" or "error".
+        """
+        try:
+            with open(storage_state, encoding="utf-8") as f:
+                cookies = json.load(f).get("cookies", [])
+        except (OSError, ValueError) as e:
+            return "error", f"unreadable storage state: {e}"
+
+        now = time.time()
+        for name in self.REQUIRED_COOKIES:
+            cookie = next((c for c in cookies if c.get("name") == name and "x.com" in c.get("domain", "")), None)
+            if cookie is None:
+                return "expired", f"missing cookie {name}"
+            # expires == -1 means a session cookie
+            expires = cookie.get("expires", -1)
+            if expires != -1 and expires < now:
+                return "expired", f"cookie {name} expired at {time.strftime('%Y-%m-%d %H:%M', time.localtime(expires))}"
+        return "ok", ""
+
+    async def _probe(self, browser, semaphore, storage_state: str):
+        """
+        Open the home page with one account and classify the result
+        """
+        async with semaphore:
+            options = {"storage_state": storage_state, "viewport": LEAN_VIEWPORT}
+            if self.user_agent_factory is not None:
+                options["user_agent"] = self.user_agent_factory()
+            context = await browser.new_context(**options)
+            try:
+                page = await context.new_page()
+                started = time.time()
+                await page.goto(self.PROBE_URL, wait_until="domcontentloaded", timeout=self.probe_timeout)
+                try:
+                    await page.wait_for_selector(
+                        'a[data-testid="AppTabBar_Profile_Link"]', timeout=self.probe_timeout
+                    )
+                except Exception:
+                    if "/account/access" in page.url:
+                        return "locked", page.url
+                    if "/login" in page.url or "/i/flow/" in page.url:
+                        return "logged_out", page.url
+                    return "slow", f"home timeline did not load within {self.probe_timeout} ms"
+                return "ok", f"{time.time() - started:.1f} s"
+            except Exception as e:
+                return "error", str(e).splitlines()[0]
+            finally:
+                await context.close()
+
+    async def probe_all(self, storage_states: list[str]) -> list:
+        """
+        Probe every account concurrently, returns [(status, detail)] in the same order
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_PROBES)
+        async with async_playwright() as p:
+            # Probes only load one page, so they always use the lean profile's flags
+            browser = await p.chromium.launch(headless=self.headless, args=LEAN_LAUNCH_ARGS)
+            try:
+                return await asyncio.gather(*[
+                    self._probe(browser, semaphore, state) for state in storage_states
+                ])
+            finally:
+                await browser.close()
+
+    def run(self, storage_states: list[str]) -> list[str]:
+        """
+        Check all storage states offline, probe the remaining ones online, print a report,
+        and return the usable storage states (healthy first, slow ones last)
+        """
+        report = {state: self.check_offline(state) for state in storage_states}
+        to_probe = [state for state, (status, _) in report.items() if status == "ok"]
+        if to_probe:
+            self.logger.info(f"Probing {len(to_probe)} accounts...")
+            print(f"正在檢查 {len(to_probe)} 個帳號的登入狀態...")
+            for state, result in zip(to_probe, asyncio.run(self.probe_all(to_probe))):
+                report[state] = result
+
+        print("帳號檢查結果:")
+        for state, (status, detail) in report.items():
+            self.logger.info(f"Preflight {state}: {status} {detail}")
+            print(f"  {state}: {status} {detail}")
+
+        usable = [state for state, (status, _) in report.items() if status in ("ok", "slow")]
+        usable.sort(key=lambda state: self.STATUS_ORDER.index(report[state][0]))
+        dead = len(storage_states) - len(usable)
+        if dead:
+            print(f"{dead} 個帳號無法使用，本次查詢將略過，請重新執行登入驗證。")
+        return usable
@@ -0,0 +1,101 @@
+import json
+import time
+from pathlib import Path
+from logger import LoggerManager
+
+
+class ResultStream:
+    """
+    ResultStream writes crawl results as JSON Lines while the crawl is running,
+    one record per line, flushed immediately so downstream jobs can follow the file.
+    Record types:
+        run: Written once when the stream is opened (start time, keyword profiles).
+        tweet: A matching tweet (author, tweet id, matched keywords, profiles, media URLs, local paths, hashes).
+        author: The final status of an author (complete / empty / incomplete / cached / deferred / dormant)
+            with its images and their profiles. Dormant authors were skipped by the scheduler.
+        transcoded: Written while crawling when downloaded images have been re-encoded,
+            {JPEG local path: new local path}; the JPEG no longer exists.
+        duplicates: Written after the crawl if near-duplicate images were removed,
+            {removed local path: representative local path}.
+    args:
+        path: The JSON Lines file; it is truncated when the stream is opened.
+    methods:
+        open: Start a new stream and write the run record.
+        write: Append one record and flush it.
+        read_records: Read every record back from the file.
+        read_results: Rebuild the per-author results (as used by generate_html) from the author records,
+            with local paths updated by transcoded / duplicates records, and the media skipped
+            by the preview stage taken from the tweet records.
+        close: Close the file.
+    """
+    logger = LoggerManager("scraper").get_logger()
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+
+    def open(self, profiles: dict):
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.write({"type": "run", "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "profiles": profiles})
+        self.logger.info(f"Streaming results to {self.path}")
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def read_records(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A partially written last line (e.g. the crawl was interrupted)
+                    self.logger.info(f"Skipping unreadable line in {self.path}")
+
+    def read_results(self) -> list[dict]:
+        records = list(self.read_records())
+        moved = {}
+        skipped = {}
+        for record in records:
+            if record.get("type") in ("transcoded", "duplicates"):
+                moved.update(record["paths"])
+            elif record.get("type") == "tweet":
+                for item in record["media"]:
+                    if item["skipped"]:
+                        skipped.setdefault(record["author_url"], {})[item["url"]] = record["profiles"]
+
+        def resolve(path):
+            seen = set()
+            while path in moved and path not in seen:
+                seen.add(path)
+                path = moved[path]
+            return path
+
+        results = []
+        for record in records:
+            if record.get("type") != "author":
+                continue
+            images = list(dict.fromkeys(resolve(p) for p in record["images"]))
+            profiles = {}
+            for path, names in record["profiles"].items():
+                merged = profiles.setdefault(resolve(path), [])
+                merged.extend(n for n in names if n not in merged)
+            results.append({
+                "author": record["author"],
+                "images": [Path(p) for p in images],
+                "profiles": profiles,
+                "incomplete": record["status"] in ("incomplete", "deferred"),
+                "dormant": record["status"] == "dormant",
+                "skipped_media": [
+                    {"url": url, "profiles": names} for url, names in skipped.get(record["author_url"], {}).items()
+                ]
+            })
+        return results
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,106 @@
+import math
+import time
+from database import DatabaseManager
+from logger import LoggerManager
+
+
+class AuthorScheduler:
+    """
+    AuthorScheduler decides the crawl order of authors from their recorded history,
+    so that likely-productive authors are crawled first and dormant ones are revisited less often.
+    args:
+        db: DatabaseManager holding the per-author statistics.
+        profile_key: Normalized keyword set of this run; history is kept and read per key,
+            so misses under other keywords do not make an author dormant.
+        dormant_after: Consecutive runs without matching images before an author is considered dormant.
+        base_revisit_days: Revisit interval of an author that has just become dormant.
+        max_revisit_days: Upper bound of the revisit interval; it doubles with each further miss.
+            Runs where the search page was empty (the author posted nothing at all) count twice.
+    methods:
+        plan: Split author URLs into (ordered authors to crawl, dormant authors skipped this run).
+        record: Record the outcome of crawling an author.
+        mark_incomplete: Defer an author whose crawl was cut short by a budget or the run deadline.
+        score: Priority score of an author.
+        revisit_interval: Seconds to wait before revisiting an author.
+    """
+    # Default revisit policy
+    DORMANT_AFTER_MISSES = 3
+    BASE_REVISIT_DAYS = 2
+    MAX_REVISIT_DAYS = 14
+
+    # Matches older than this (in days) no longer boost the priority much
+    RECENT_MATCH_DECAY_DAYS = 14
+
+    # Prior hit rate given to authors that have never been crawled, so they are tried early
+    NEW_AUTHOR_SCORE = 1.0
+
+    logger = LoggerManager("scheduler").get_logger()
+
+    def __init__(self, db: DatabaseManager, profile_key="", dormant_after=None, base_revisit_days=None, max_revisit_days=None):
+        self.db = db
+        self.profile_key = profile_key
+        self.dormant_after = self.DORMANT_AFTER_MISSES if dormant_after is None else dormant_after
+        self.base_revisit_days = self.BASE_REVISIT_DAYS if base_revisit_days is None else base_revisit_days
+        self.max_revisit_days = self.MAX_REVISIT_DAYS if max_revisit_days is None else max_revisit_days
+
+    def plan(self, author_urls: list[str], now=None):
+        """
+        Return (due, skipped): due authors sorted by descending score, and dormant authors
+        whose revisit interval has not elapsed yet. Authors deferred as incomplete always come first.
+        """
+        now = time.time() if now is None else now
+        stats = self.db.get_author_stats(self.profile_key)
+        due = []
+        skipped = []
+        for url in author_urls:
+            stat = stats.get(url)
+            if stat and not stat["incomplete"] and now - (stat["last_crawl_ts"] or 0) < self.revisit_interval(stat):
+                skipped.append(url)
+            else:
+                due.append(url)
+
+        # sorted() is stable, so authors with equal scores keep their database order
+        due = sorted(
+            due,
+            key=lambda url: (bool(stats.get(url) and stats[url]["incomplete"]), self.score(stats.get(url), now)),
+            reverse=True
+        )
+        self.logger.info(f"Scheduled {len(due)} authors, skipped {len(skipped)} dormant authors")
+        return due, skipped
+
+    def score(self, stat, now=None) -> float:
+        """
+        Smoothed hit rate, boosted by how recently the author last posted matching images.
+        The hit rate is scaled down by the share of runs whose search page was empty.
+        """
+        if stat is None or not stat["crawl_count"]:
+            return self.NEW_AUTHOR_SCORE
+        now = time.time() if now is None else now
+        hit_rate = (stat["hit_count"] + 1) / (stat["crawl_count"] + 2)
+        active_rate = (stat["crawl_count"] - (stat["empty_count"] or 0) + 1) / (stat["crawl_count"] + 2)
+        hit_rate *= active_rate
+        recency = 0.0
+        if stat["last_match_ts"]:
+            age_days = max(0.0, now - stat["last_match_ts"]) / 86400
+            recency = math.exp(-age_days / self.RECENT_MATCH_DECAY_DAYS)
+        return hit_rate + recency
+
+    def revisit_interval(self, stat) -> float:
+        """
+        0 for active authors; for dormant ones base_revisit_days, doubling with every further miss.
+        Consecutive empty search pages are a stronger signal than tweets without images, so they count twice.
+        """
+        misses = (stat["miss_streak"] or 0) + (stat.get("empty_streak") or 0)
+        if misses < self.dormant_after:
+            return 0
+        days = min(self.base_revisit_days * 2 ** (misses - self.dormant_after), self.max_revisit_days)
+        return days * 86400
+
+    def record(self, author_url: str, image_count: int, empty: bool):
+        """
+        Record a crawl outcome. empty means the search page had no results at all.
+        """
+        self.db.update_author_stats(author_url, self.profile_key, hit=image_count > 0, empty=empty, now=time.time())
+
+    def mark_incomplete(self, author_url: str):
+        self.db.mark_author_incomplete(author_url, self.profile_key)